@@ -0,0 +1,47 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+# Throughput of BskyAgent vs. AsyncBskyAgent against a local mock PDS.
+# usage: python -m benchmarks.async_agent [requests] [latency] [concurrency]
+
+import asyncio
+import sys
+import time
+
+from nanoatp import AsyncBskyAgent, BskyAgent
+from tests.mockpds import MockPDS
+
+
+def bench_sync(pds: MockPDS, n: int):
+    agent = BskyAgent(pds.url)
+    agent.login(pds.handle, pds.password)
+    start = time.perf_counter()
+    for _ in range(n):
+        agent.resolveHandle(pds.handle)
+    return n / (time.perf_counter() - start)
+
+
+def bench_async(pds: MockPDS, n: int, concurrency: int):
+    async def run():
+        async with AsyncBskyAgent(pds.url, maxConcurrency=concurrency) as agent:
+            await agent.login(pds.handle, pds.password)
+            start = time.perf_counter()
+            await asyncio.gather(*[agent.resolveHandle(pds.handle) for _ in range(n)])
+            return n / (time.perf_counter() - start)
+
+    return asyncio.run(run())
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    with MockPDS(latency=latency) as pds:
+        sync = bench_sync(pds, n)
+        print(f"BskyAgent:      {sync:8.1f} req/s")
+        async_ = bench_async(pds, n, concurrency)
+        print(f"AsyncBskyAgent: {async_:8.1f} req/s (maxConcurrency={concurrency}, {async_ / sync:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+# Decode/encode throughput of the JSON codecs over listRecords and getTimeline shaped payloads.
+# usage: python -m benchmarks.codec [iterations]
+
+import sys
+import time
+
+from nanoatp.codec import PREFERENCE, getCodec
+
+DID = "did:plc:ewvi7nxzyoun6zhxrhs64oiz"
+CID = "bafyreie5737gdxlw5i64vzichcalba3z2v5n6icifvx5xytvske7mr3hpm"
+
+
+def post(i: int):
+    return {
+        "$type": "app.bsky.feed.post",
+        "text": f"Post {i}: 日本語のテキストと emoji 🦋 and a link https://example.com/{i}",
+        "createdAt": "2025-01-01T00:00:00.000Z",
+        "langs": ["ja", "en"],
+        "facets": [
+            {
+                "index": {"byteStart": 60, "byteEnd": 84},
+                "features": [{"$type": "app.bsky.richtext.facet#link", "uri": f"https://example.com/{i}"}],
+            }
+        ],
+    }
+
+
+def listRecords(n: int = 100):
+    records = [{"uri": f"at://{DID}/app.bsky.feed.post/3k{i:011d}", "cid": CID, "value": post(i)} for i in range(n)]
+    return {"records": records, "cursor": "3k00000000099"}
+
+
+def getTimeline(n: int = 50):
+    author = {"did": DID, "handle": "alice.bsky.social", "displayName": "Alice", "avatar": "https://cdn/avatar.jpg"}
+    feed = []
+    for i in range(n):
+        view = {
+            "uri": f"at://{DID}/app.bsky.feed.post/3k{i:011d}",
+            "cid": CID,
+            "author": {**author, "viewer": {"muted": False, "blockedBy": False}, "labels": []},
+            "record": post(i),
+            "replyCount": i,
+            "repostCount": i * 2,
+            "likeCount": i * 3,
+            "indexedAt": "2025-01-01T00:00:00.000Z",
+            "viewer": {"like": f"at://{DID}/app.bsky.feed.like/3k{i:011d}"},
+            "labels": [],
+        }
+        feed.append({"post": view})
+    return {"feed": feed, "cursor": "1735689600000::" + CID}
+
+
+def bench(fn, n: int):  # type: ignore
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    for label, payload in [("listRecords(100)", listRecords()), ("getTimeline(50)", getTimeline())]:
+        data = getCodec("json").dumps(payload)
+        print(f"{label}: {len(data)} bytes")
+        for name in PREFERENCE:
+            try:
+                codec = getCodec(name)
+            except ImportError:
+                print(f"  {name:8}: not installed")
+                continue
+            loads = bench(lambda: codec.loads(data), n)
+            dumps = bench(lambda: codec.dumps(payload), n)
+            print(f"  {name:8}: loads {loads:8.1f} us  dumps {dumps:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import statistics
+import time
+from typing import Any, Callable
+
+import pytest
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+
+    class Benchmark:
+        """a minimal stand-in for the pytest-benchmark fixture: times `rounds` calls and prints the stats."""
+
+        def __init__(self, name: str, rounds: int = 5):
+            self.name = name
+            self.rounds = rounds
+            self.extra_info: dict[str, Any] = {}
+
+        def __call__(self, fn: Callable[..., Any], *args: Any, **kwargs: Any):
+            return self.pedantic(fn, args, kwargs)
+
+        def pedantic(
+            self,
+            fn: Callable[..., Any],
+            args: tuple[Any, ...] = (),
+            kwargs: dict[str, Any] | None = None,
+            setup: Callable[[], Any] | None = None,
+            rounds: int = 0,
+            **_: Any,
+        ):
+            times = []
+            for _ in range(rounds or self.rounds):
+                setup() if setup else None
+                start = time.perf_counter()
+                result = fn(*args, **(kwargs or {}))
+                times.append(time.perf_counter() - start)
+            extra = " ".join(f"{key}={value}" for key, value in self.extra_info.items())
+            print(
+                f"\n{self.name}: min {min(times) * 1000:.2f} ms, mean {statistics.mean(times) * 1000:.2f} ms, "
+                f"rounds {len(times)} {extra}"
+            )
+            return result
+
+    @pytest.fixture
+    def benchmark(request: pytest.FixtureRequest):
+        return Benchmark(request.node.name)
@@ -0,0 +1,30 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+# Decoding throughput of Firehose against a local WebSocket server replaying commit frames.
+# usage: python -m benchmarks.firehose [events] [records per commit]
+
+import sys
+import time
+
+from nanoatp import Firehose
+from tests.mockfirehose import MockFirehose, commitFrame
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    records = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    frames = []
+    for seq in range(1, n + 1):
+        ops = [(f"app.bsky.feed.post/{seq}-{i}", {"text": f"post {seq} {i}", "langs": ["en"]}) for i in range(records)]
+        frames.append((seq, commitFrame(seq, "did:plc:alice", ops)))
+    with MockFirehose(frames) as mock:
+        for decodeRecords in [False, True]:
+            start = time.perf_counter()
+            count = sum(1 for _ in Firehose(mock.url, reconnect=False, decodeRecords=decodeRecords))
+            elapsed = time.perf_counter() - start
+            print(f"decodeRecords={decodeRecords!s:5}: {count / elapsed:10.1f} events/s ({count} events)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+# Repeatable benchmarks of BskyAgent against a local mock PDS (tests/mockpds.py), no credentials needed.
+# usage: python -m pytest benchmarks/suite.py [--benchmark-compare]  # with pytest-benchmark installed
+#        python -m pytest benchmarks/suite.py -s                      # without it, timings are printed
+# BENCH_LATENCY (seconds per request, default 0) simulates the network round trip.
+
+import os
+
+import pytest
+
+from nanoatp import BskyAgent, RichText
+from nanoatp.richtext import detectFacets
+from tests.mockpds import MockPDS
+
+LATENCY = float(os.getenv("BENCH_LATENCY") or 0.0)
+POSTS = 1000  # in the repo listed by the pagination benchmarks
+
+
+@pytest.fixture(scope="module")
+def pds():  # type: ignore
+    with MockPDS(latency=LATENCY) as pds:
+        for i in range(100):
+            pds.handles[f"user{i}.test"] = f"did:plc:user{i}"
+        yield pds
+
+
+@pytest.fixture(scope="module")
+def agent(pds):  # type: ignore
+    """reads a repo of POSTS posts"""
+    agent = BskyAgent(pds.url)
+    agent.login(pds.handle, pds.password)
+    with agent.batch() as batch:
+        for i in range(POSTS):
+            batch.post({"text": f"post {i}"})
+    return agent
+
+
+@pytest.fixture(scope="module")
+def writer(pds):  # type: ignore
+    """writes to another account, so the repo read by the other benchmarks stays the same size"""
+    pds.addAccount("writer.test", "password")
+    agent = BskyAgent(pds.url)
+    agent.login("writer.test", "password")
+    return agent
+
+
+def corpus(n: int):
+    """posts with mentions, links and tags, in English and Japanese."""
+    texts = [
+        "Hello @user{i}.test, see https://example.com/posts/{i}?ref=bsky #python #atproto",
+        "こんにちは @user{i}.test 🦋 詳細は example.com/ja/{i} を見てね #日本語 #テスト",
+        "plain text without any facets, number {i}, just to measure the scan over ordinary words",
+        "(https://github.com/susumuota/nanoatp/issues/{i}) and nanoatp.bsky.social. ＃全角タグ{i}",
+    ]
+    return [texts[i % len(texts)].format(i=i % 100) for i in range(n)]
+
+
+def test_login(benchmark, pds):
+    def login():
+        agent = BskyAgent(pds.url)
+        agent.login(pds.handle, pds.password)
+        return agent
+
+    assert benchmark(login).session
+
+
+def test_post(benchmark, writer):
+    def post(n: int = 50):
+        return [writer.post({"text": f"benchmark {i}"}) for i in range(n)]
+
+    benchmark.extra_info["posts"] = 50
+    assert all(response.get("uri") for response in benchmark(post))
+
+
+def test_post_batch(benchmark, writer):
+    def post(n: int = 200):
+        with writer.batch() as batch:
+            for i in range(n):
+                batch.post({"text": f"benchmark {i}"})
+        return batch.results
+
+    benchmark.extra_info["posts"] = 200
+    assert len(benchmark(post)) == 200
+
+
+def test_post_thread(benchmark, writer):
+    benchmark.extra_info["posts"] = 30
+    assert len(benchmark(writer.postThread, [f"{i}/30 @user{i}.test #thread" for i in range(30)])) == 30
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_iter_records(benchmark, pds, agent, prefetch):
+    def iterate():
+        return sum(1 for _ in agent.iterRecords(pds.did, "app.bsky.feed.post", limit=100, prefetch=prefetch))
+
+    benchmark.extra_info["records"] = POSTS
+    assert benchmark(iterate) == POSTS
+
+
+def test_get_posts(benchmark, pds, agent):
+    uris = [f"at://{pds.did}/app.bsky.feed.post/{rkey}" for rkey in sorted(pds.records["app.bsky.feed.post"])[:250]]
+    benchmark.extra_info["posts"] = len(uris)
+    assert len(benchmark(agent.getPosts, uris)["posts"]) == 250
+
+
+@pytest.mark.parametrize("size", [1 << 10, 1 << 20])
+def test_upload_blob(benchmark, writer, size):
+    data = os.urandom(size)
+    benchmark.extra_info["bytes"] = size
+    assert benchmark(writer.uploadBlob, data, "image/png")["blob"]["size"] == size
+
+
+def test_resolve_handles(benchmark, agent):
+    def resolve():
+        agent.handleCache.clear()
+        return agent.resolveHandles([f"user{i}.test" for i in range(100)])
+
+    assert all(benchmark(resolve).values())
+
+
+def test_detect_facets(benchmark):
+    texts = corpus(10000)
+    benchmark.extra_info["texts"] = len(texts)
+    facets = benchmark(lambda: [detectFacets(text) for text in texts])
+    assert sum(map(len, facets)) > len(texts)
+
+
+def test_detect_facets_long(benchmark):
+    text = " ".join(corpus(1000))  # one long text, about 80 KB
+    benchmark.extra_info["bytes"] = len(text.encode())
+    assert len(benchmark(detectFacets, text)) > 1000
+
+
+def test_richtext_detect_facets(benchmark, agent):
+    texts = corpus(1000)
+
+    def detect():
+        agent.handleCache.clear()
+        for text in texts:
+            RichText(text).detectFacets(agent)
+
+    benchmark.extra_info["texts"] = len(texts)
+    benchmark(detect)
@@ -3,31 +3,15 @@
 
 # THIS SCRIPT DELETES ALL POSTS FROM YOUR ACCOUNT. USE WITH CAUTION!!!
 
-from time import sleep
-
-from nanoatp import BskyAgent
+from nanoatp import BskyAgent, Outbox
 
 agent = BskyAgent()
-session = agent.login()
-
-cursor = ""
-records = []
-while True:
-    # newest first
-    response = agent._repo_listRecords(session["did"], "app.bsky.feed.post", limit=10, cursor=cursor)
-    print(response.get("cursor"), len(response.get("records") or []))
-    cursor = response.get("cursor") or ""
-    records.extend(response.get("records") or [])
-    if not cursor:
-        break
-    sleep(1)
-
-records.reverse()  # oldest first
-# records = sorted(records, key=lambda x: x["value"]["createdAt"])  # should be same as above
+agent.login()
 
-# delete all posts from oldest to newest
-for record in records:
-    print("deleting...", record["value"]["text"].replace("\n", " ")[:40])
-    r = agent.deletePost(record["uri"])
-    print("deleting...done: ", r.status_code)
-    sleep(1)
+# delete all posts from oldest to newest, up to 200 posts per applyWrites call.
+# the jobs and the listRecords cursor are kept in delete_all_posts.db. if the script is interrupted,
+# run it again: listing resumes from the last checkpoint and only the remaining deletes are sent.
+# once everything has been deleted, running it again lists the posts made since then.
+with Outbox(agent, "delete_all_posts.db") as outbox:
+    print("queued: ", outbox.enqueueDeletes("app.bsky.feed.post"))
+    print("deleting...done: ", outbox.run())
@@ -0,0 +1,16 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from nanoatp import BskyAgent
+
+agent = BskyAgent()
+agent.login()
+
+# each segment replies to the previous one. the whole thread is sent with one applyWrites call
+refs = agent.postThread(["Hello World! 🧵", "Reply 1 https://github.com/susumuota/nanoatp", "Reply 2 #python"])
+print(refs)
+
+# continue the thread later
+root, parent = refs[0], refs[-1]
+refs = agent.postThread(["Reply 3", "Reply 4"], reply={"root": root, "parent": parent})
+print(refs)
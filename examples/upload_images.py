@@ -19,10 +19,9 @@ with tempfile.TemporaryDirectory() as tmp_dir:
     tmp_file = os.path.join(tmp_dir, "favicon-16x16.png")
     with open(tmp_file, "wb") as f:
         f.write(response.content)
-    # upload the image 4 times
-    images = [agent.uploadImage(tmp_file, f"this is alt {i}") for i in range(4)]
+    # upload the image 4 times concurrently and make an embed with 4 images
+    embed = agent.uploadImages([(tmp_file, f"this is alt {i}") for i in range(4)])
     # post a record with 4 images
-    embed = {"$type": "app.bsky.embed.images", "images": images}
     record = {"text": "upload images", "embed": embed}
     response = agent.post(record)
     print(response)
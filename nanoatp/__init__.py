@@ -1,8 +1,69 @@
 # SPDX-FileCopyrightText: 2023-2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
 # SPDX-License-Identifier: MIT
 
-from .bskyagent import BskyAgent, parseAtUri
-from .richtext import RichText
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .asyncbskyagent import AsyncBskyAgent
+    from .blobcache import BlobCache
+    from .bskyagent import BskyAgent
+    from .firehose import Firehose
+    from .image import ImageProcessor
+    from .metrics import Metrics
+    from .outbox import Outbox
+    from .pool import AgentPool
+    from .ratelimit import RateLimiter
+    from .repo import RepoReader
+    from .richtext import RichText
+    from .sessionstore import FileSessionStore, MemorySessionStore
+    from .uri import parseAtUri
 
 __version__ = "0.5.1"
-__all__ = ['__version__', 'BskyAgent', 'parseAtUri', 'RichText']
+__all__ = [
+    '__version__',
+    'AgentPool',
+    'AsyncBskyAgent',
+    'BlobCache',
+    'BskyAgent',
+    'Firehose',
+    'ImageProcessor',
+    'Metrics',
+    'Outbox',
+    'parseAtUri',
+    'RateLimiter',
+    'RepoReader',
+    'RichText',
+    'FileSessionStore',
+    'MemorySessionStore',
+]
+
+# submodules are imported on first attribute access, so `import nanoatp` does not load requests
+_submodules = {
+    'AgentPool': '.pool',
+    'AsyncBskyAgent': '.asyncbskyagent',
+    'BlobCache': '.blobcache',
+    'BskyAgent': '.bskyagent',
+    'Firehose': '.firehose',
+    'ImageProcessor': '.image',
+    'Metrics': '.metrics',
+    'Outbox': '.outbox',
+    'parseAtUri': '.uri',
+    'RateLimiter': '.ratelimit',
+    'RepoReader': '.repo',
+    'RichText': '.richtext',
+    'FileSessionStore': '.sessionstore',
+    'MemorySessionStore': '.sessionstore',
+}
+
+
+def __getattr__(name: str):
+    if name not in _submodules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_submodules[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
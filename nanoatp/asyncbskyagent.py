@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, BinaryIO, Callable
+
+from requests.adapters import HTTPAdapter
+
+from .blobcache import BlobCache
+from .bskyagent import BskyAgent
+from .codec import Codec
+from .image import ImageProcessor
+from .metrics import Metrics
+from .ratelimit import RateLimiter
+from .sessionstore import SessionStore
+
+
+class AsyncBskyAgent:
+    """asyncio version of BskyAgent.
+
+    Calls run on a thread pool of `maxConcurrency` workers that share one `requests.Session`,
+    whose connection pool is sized to match, so at most `maxConcurrency` requests are in flight
+    and their keep-alive connections are reused.
+
+    async with AsyncBskyAgent() as agent:
+        await agent.login()
+        posts = await asyncio.gather(*[agent.getPost(repo, rkey) for rkey in rkeys])
+    """
+
+    def __init__(
+        self,
+        service: str = "https://bsky.social",
+        maxConcurrency: int = 10,
+        sessionStore: SessionStore | None = None,
+        rateLimiter: RateLimiter | None = None,
+        blobCache: BlobCache | None = None,
+        codec: Codec | None = None,
+        metrics: Metrics | None = None,
+        imageProcessor: ImageProcessor | None = None,
+    ):
+        self.agent = BskyAgent(
+            service, sessionStore, rateLimiter, blobCache, codec=codec, metrics=metrics, imageProcessor=imageProcessor
+        )
+        self.maxConcurrency = maxConcurrency
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxConcurrency)
+        self.agent.requests.mount("https://", adapter)
+        self.agent.requests.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=maxConcurrency, thread_name_prefix="nanoatp")
+
+    @property
+    def service(self):
+        return self.agent.service
+
+    @property
+    def session(self):
+        return self.agent.session
+
+    @property
+    def headers(self):
+        return self.agent.headers
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args: Any):
+        await self.close()
+
+    async def close(self):
+        """wait for the calls in flight to finish, without blocking the event loop, and close the session."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(self.executor.shutdown, wait=True))
+        self.agent.requests.close()
+
+    async def _run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def login(self, identifier: str = "", password: str = ""):
+        return await self._run(self.agent.login, identifier, password)
+
+    async def refreshSession(self):
+        return await self._run(self.agent.refreshSession)
+
+    async def getPost(self, repo: str, rkey: str, cid: str = ""):
+        return await self._run(self.agent.getPost, repo, rkey, cid)
+
+    async def getPosts(self, uris: list[str], maxWorkers: int = 4):
+        return await self._run(self.agent.getPosts, uris, maxWorkers)
+
+    async def post(self, record: dict[str, Any]):
+        return await self._run(self.agent.post, record)
+
+    async def postThread(
+        self, segments: list[str | dict[str, Any]], reply: dict[str, Any] | None = None, pipeline: bool = True
+    ):
+        return await self._run(self.agent.postThread, segments, reply, pipeline)
+
+    async def deletePost(self, postUri: str):
+        return await self._run(self.agent.deletePost, postUri)
+
+    async def applyWrites(self, writes: list[dict[str, Any]], validate: bool = True):
+        return await self._run(self.agent.applyWrites, writes, validate)
+
+    async def exportRepo(self, did: str = "", path: str = "", chunkSize: int = 1 << 20):
+        return await self._run(self.agent.exportRepo, did, path, chunkSize)
+
+    async def uploadBlob(self, data: bytes | BinaryIO, encoding: str):
+        return await self._run(self.agent.uploadBlob, data, encoding)
+
+    async def resolveHandle(self, handle: str):
+        return await self._run(self.agent.resolveHandle, handle)
+
+    async def getTimeline(self, algorithm: str = "", limit: int = 50, cursor: str = ""):
+        return await self._run(self.agent.getTimeline, algorithm, limit, cursor)
+
+    async def getAuthorFeed(self, actor: str, limit: int = 50, cursor: str = "", filter: str = ""):
+        return await self._run(self.agent.getAuthorFeed, actor, limit, cursor, filter)
+
+    async def getPostThread(self, uri: str, depth: int | None = None, parentHeight: int | None = None):
+        return await self._run(self.agent.getPostThread, uri, depth, parentHeight)
+
+    async def getProfile(self, actor: str):
+        return await self._run(self.agent.getProfile, actor)
+
+    async def getFollows(self, actor: str, limit: int = 50, cursor: str = ""):
+        return await self._run(self.agent.getFollows, actor, limit, cursor)
+
+    async def getFollowers(self, actor: str, limit: int = 50, cursor: str = ""):
+        return await self._run(self.agent.getFollowers, actor, limit, cursor)
+
+    async def listNotifications(self, limit: int = 50, cursor: str = "", seenAt: str = ""):
+        return await self._run(self.agent.listNotifications, limit, cursor, seenAt)
+
+    async def call(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._run(self.agent.call, *args, **kwargs)
+
+    async def uploadImage(self, path: str, alt: str = "", encoding: str = ""):
+        return await self._run(self.agent.uploadImage, path, alt, encoding)
+
+    async def uploadImages(self, images: list[str | tuple[str, str]], maxWorkers: int = 4):
+        return await self._run(self.agent.uploadImages, images, maxWorkers)
+
+    async def uploadExternal(self, uri: str):
+        return await self._run(self.agent.uploadExternal, uri)
+
+    async def _server_createSession(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return await self._run(self.agent._server_createSession, *args, **kwargs)
+
+    async def _server_refreshSession(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return await self._run(self.agent._server_refreshSession, *args, **kwargs)
+
+    async def _repo_createRecord(self, *args: Any, **kwargs: Any) -> dict[str, str]:
+        return await self._run(self.agent._repo_createRecord, *args, **kwargs)
+
+    async def _repo_applyWrites(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return await self._run(self.agent._repo_applyWrites, *args, **kwargs)
+
+    async def _repo_getRecord(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return await self._run(self.agent._repo_getRecord, *args, **kwargs)
+
+    async def _repo_deleteRecord(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._run(self.agent._repo_deleteRecord, *args, **kwargs)
+
+    async def _repo_listRecords(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return await self._run(self.agent._repo_listRecords, *args, **kwargs)
+
+    async def _repo_uploadBlob(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return await self._run(self.agent._repo_uploadBlob, *args, **kwargs)
+
+    async def _identity_resolveHandle(self, *args: Any, **kwargs: Any) -> dict[str, str]:
+        return await self._run(self.agent._identity_resolveHandle, *args, **kwargs)
+
+    async def _graph_getBlocks(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return await self._run(self.agent._graph_getBlocks, *args, **kwargs)
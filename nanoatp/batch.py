@@ -0,0 +1,82 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+from .uri import parseAtUri
+
+if TYPE_CHECKING:
+    from .bskyagent import BskyAgent
+
+APPLY_WRITES_LIMIT = 200  # max writes per com.atproto.repo.applyWrites call on bsky.social
+
+
+class BatchWriter:
+    """Buffers writes and sends them with com.atproto.repo.applyWrites.
+
+    The buffer is flushed when it holds `maxWrites` writes, when a write is added more than
+    `interval` seconds after the oldest buffered one, on `flush()` and on leaving the `with` block.
+    Results of all flushed writes are collected in `results`.
+    """
+
+    def __init__(self, agent: BskyAgent, maxWrites: int = APPLY_WRITES_LIMIT, interval: float = 10.0):
+        self.agent = agent
+        self.maxWrites = min(maxWrites, APPLY_WRITES_LIMIT)
+        self.interval = interval
+        self.writes: list[dict[str, Any]] = []
+        self.results: list[dict[str, Any]] = []
+        self.started = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type: Any, *args: Any):
+        if exc_type is None:
+            self.flush()
+
+    def __len__(self):
+        return len(self.writes)
+
+    def add(self, write: dict[str, Any]):
+        """add a com.atproto.repo.applyWrites#create, #update or #delete write."""
+        if not self.writes:
+            self.started = time.monotonic()
+        self.writes.append(write)
+        if len(self.writes) >= self.maxWrites or time.monotonic() - self.started >= self.interval:
+            self.flush()
+        return self
+
+    def create(self, collection: str, record: dict[str, Any], rkey: str = ""):
+        write = {"$type": "com.atproto.repo.applyWrites#create", "collection": collection, "value": record}
+        write.update({"rkey": rkey}) if rkey != "" else None
+        return self.add(write)
+
+    def update(self, collection: str, rkey: str, record: dict[str, Any]):
+        write = {"$type": "com.atproto.repo.applyWrites#update", "collection": collection, "rkey": rkey}
+        write.update({"value": record})
+        return self.add(write)
+
+    def delete(self, collection: str, rkey: str):
+        return self.add({"$type": "com.atproto.repo.applyWrites#delete", "collection": collection, "rkey": rkey})
+
+    def post(self, record: dict[str, Any]):
+        from .bskyagent import postRecord
+
+        return self.create("app.bsky.feed.post", postRecord(record))
+
+    def deletePost(self, postUri: str):
+        repo, collection, rkey = parseAtUri(postUri)
+        if not (repo and collection and rkey):
+            raise Exception(f"Invalid postUri format: {postUri}")
+        return self.delete(collection, rkey)
+
+    def flush(self):
+        if not self.writes:
+            return []
+        writes, self.writes = self.writes, []
+        results = self.agent.applyWrites(writes).get("results") or []
+        self.results.extend(results)
+        return results
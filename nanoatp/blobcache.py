@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any
+
+BLOB_CACHE_TTL = 60 * 60  # seconds, a PDS may delete an uploaded blob that no record references after a while
+
+
+class BlobCache:
+    """Remembers blob refs returned by uploadBlob, keyed by account, the content's CID and MIME type,
+    so identical bytes are uploaded only once per account.
+
+    The index is a SQLite database at `path` (in memory if path is ""). It keeps at most `maxEntries` refs and
+    evicts the least recently used ones. A PDS deletes blobs that no record references, e.g. an upload that
+    was never posted or whose posts were deleted, so refs expire after `ttl` seconds (never if None).
+    BskyAgent also drops the refs of a record that the PDS rejects for a missing blob.
+    """
+
+    def __init__(self, path: str = "", maxEntries: int = 10000, ttl: float | None = BLOB_CACHE_TTL):
+        self.path = path
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs (key TEXT PRIMARY KEY, blob TEXT NOT NULL, created REAL, used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS blobs_used ON blobs (used)")
+        self.db.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def get(self, did: str, cid: str, mimeType: str) -> dict[str, Any] | None:
+        key = f"{did} {cid} {mimeType}"
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT blob, created FROM blobs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and row[1] + self.ttl <= now:
+                self.db.execute("DELETE FROM blobs WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute("UPDATE blobs SET used = ? WHERE key = ?", (now, key))
+            self.db.commit()
+        return json.loads(row[0])
+
+    def set(self, did: str, cid: str, mimeType: str, blob: dict[str, Any]):
+        key = f"{did} {cid} {mimeType}"
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?)", (key, json.dumps(blob), now, now))
+            self.db.execute(
+                "DELETE FROM blobs WHERE key IN (SELECT key FROM blobs ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.maxEntries,),
+            )
+            self.db.commit()
+
+    def delete(self, did: str, cid: str):
+        """forget the refs of a blob, for any MIME type."""
+        prefix = f"{did} {cid} "
+        with self.lock:
+            self.db.execute("DELETE FROM blobs WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
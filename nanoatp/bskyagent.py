@@ -3,55 +3,259 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import copy
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from io import BytesIO
 from mimetypes import guess_type
-from os import getenv
-from typing import Any
-from urllib.parse import urlparse, quote
+from os import fstat, getenv
+from typing import Any, BinaryIO, Callable, Iterator
+from urllib.parse import urlsplit, urlunsplit
 
 import requests
+from urllib3.exceptions import NewConnectionError
+
+from . import cbor
+from .batch import APPLY_WRITES_LIMIT, BatchWriter
+from .blobcache import BlobCache
+from .cache import TTLCache
+from .cid import DAG_CBOR, cidForData
+from .codec import Codec, getCodec
+from .image import ImageProcessor, imageSize
+from .metrics import Metrics
+from .models import Record
+from .ratelimit import PROCEDURE_RETRY_STATUS_CODES, RETRY_STATUS_CODES, RateLimiter
+from .repo import RepoReader
+from .richtext import detectFacets, resolveMentions
+from .sessionstore import SessionStore
+from .tid import nextTid
+from .uri import parseAtUri
+from .xrpc import ENDPOINTS, JSON, compact, getEndpoint, queryParams
+
+logger = logging.getLogger(__name__)
+
+MAX_IMAGES = 4  # per app.bsky.embed.images
+LINK_META_ENDPOINT = "https://cardyb.bsky.app/v1/extract"
+LINK_CARD_CACHE_SIZE = 256
+LINK_CARD_CACHE_TTL = 60 * 60  # seconds
+HANDLE_CACHE_SIZE = 10000
+HANDLE_CACHE_TTL = 60 * 60  # seconds
+HANDLE_CACHE_NEGATIVE_TTL = 5 * 60  # seconds, for handles that could not be resolved
+RECORD_CACHE_SIZE = 10000  # records pinned to a CID never change, so they do not expire
+GET_POSTS_LIMIT = 25  # uris per app.bsky.feed.getPosts
 
 
 # TODO: replace Any
 # TODO: split BskyAgent and AtpAgent code
 class BskyAgent:
-    def __init__(self, service: str = "https://bsky.social"):
+    def __init__(
+        self,
+        service: str = "https://bsky.social",
+        sessionStore: SessionStore | None = None,
+        rateLimiter: RateLimiter | None = None,
+        blobCache: BlobCache | None = None,
+        linkMetaEndpoint: str = LINK_META_ENDPOINT,
+        linkMetaCache: TTLCache | None = None,
+        codec: Codec | None = None,
+        metrics: Metrics | None = None,
+        imageProcessor: ImageProcessor | None = None,
+    ):
         self.service = service
         self.requests = requests.Session()
         self.session: dict[str, str] = {}
         self.headers: dict[str, str] = {}
+        self.handleCache = TTLCache(maxsize=HANDLE_CACHE_SIZE, ttl=HANDLE_CACHE_TTL)
+        self.recordCache = TTLCache(maxsize=RECORD_CACHE_SIZE)  # (uri, cid) -> {"uri", "cid", "value"}
+        self.sessionStore = sessionStore
+        self.sessionKey = ""
+        self.credentials: tuple[str, str] | None = None  # (identifier, password) of a resumed session
+        self.refreshLock = threading.Lock()
+        self.rateLimiter = rateLimiter or RateLimiter()
+        self.codec = codec or getCodec()
+        self.urls = {nsid: f"{service}/xrpc/{nsid}" for nsid in ENDPOINTS}  # built once, not per request
+        self.blobCache = blobCache
+        self.linkMetaEndpoint = linkMetaEndpoint
+        # link metadata can be shared between agents, uploaded thumbnails belong to this account
+        if linkMetaCache is None:  # an empty cache is falsy
+            linkMetaCache = TTLCache(maxsize=LINK_CARD_CACHE_SIZE, ttl=LINK_CARD_CACHE_TTL)
+        self.linkMetaCache = linkMetaCache
+        self.externalCache = TTLCache(maxsize=LINK_CARD_CACHE_SIZE, ttl=LINK_CARD_CACHE_TTL)
+        # request hooks are called as hook(agent, method, nsid, params) before each attempt,
+        # response hooks as hook(agent, nsid, response or None on connection errors, seconds, attempt) after it.
+        # an exception raised by a hook is logged and does not fail the request
+        self.hooks: dict[str, list[Callable[..., Any]]] = {"request": [], "response": []}
+        self.metrics = metrics
+        self.imageProcessor = imageProcessor
+        self.hooks["response"].append(metrics.observe) if metrics is not None else None
 
     def login(self, identifier: str = "", password: str = ""):
-        """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/agent.ts"""
+        """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/agent.ts
+        if sessionStore has a session for identifier, it is resumed without a network round trip.
+        if that session turns out to be expired or revoked, a new one is created with the password
+        and replaces it in sessionStore.
+        """
         id = identifier or getenv("ATP_IDENTIFIER") or ""
         pw = password or getenv("ATP_PASSWORD") or ""
-        session = self._server_createSession(id, pw)
+        self.sessionKey = f"{self.service} {id}"
+        saved = self.sessionStore.load(self.sessionKey) if self.sessionStore else None
+        if saved and saved.get("accessJwt") and saved.get("refreshJwt"):
+            self.resumeSession(saved)
+            self.credentials = (id, pw) if pw else None  # in case the saved refreshJwt is no longer valid
+            return self.session
+        return self._createSession(id, pw)
+
+    def _createSession(self, identifier: str, password: str):
+        self.credentials = None
+        session = self._server_createSession(identifier, password)
         if session.get("error") or not session.get("accessJwt"):
-            self.session = {}
-            self.headers = {}
+            self._setSession({})
             raise Exception(str(session))
+        return self._setSession(session)
+
+    def resumeSession(self, session: dict[str, str]):
+        """use a saved session as is. an expired accessJwt is refreshed on the first call that needs it."""
+        if not session.get("accessJwt"):
+            raise Exception("Invalid session")
+        return self._setSession(session)
+
+    def refreshSession(self):
+        """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/agent.ts
+        if the refreshJwt of a resumed session is rejected, falls back to createSession.
+        """
+        if not self.session.get("refreshJwt"):
+            raise Exception("Not logged in")
+        response = self._server_refreshSession(self.session["refreshJwt"])
+        if response.get("error") or not response.get("accessJwt"):
+            if self.credentials:
+                return self._createSession(*self.credentials)
+            self._setSession({})
+            raise Exception(str(response))
+        self.credentials = None
+        return self._setSession({**self.session, **response})
+
+    def _setSession(self, session: dict[str, str]):
         self.session = session
         accessJwt = self.session.get("accessJwt")
-        self.headers = {"Authorization": f"Bearer {accessJwt}"}
+        self.headers = {"Authorization": f"Bearer {accessJwt}"} if accessJwt else {}
+        if self.sessionStore and self.sessionKey:
+            self.sessionStore.save(self.sessionKey, session) if session else self.sessionStore.delete(self.sessionKey)
         return self.session
 
     def getPost(self, repo: str, rkey: str, cid: str = ""):
-        """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/bsky-agent.ts"""
+        """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/bsky-agent.ts
+        a post pinned to a cid is answered from recordCache if getPost or getPosts has already seen it.
+        the cache keeps its own copies, so callers may modify the returned record.
+        """
+        if not self.session:
+            raise Exception("Not logged in")
+        uri = f"at://{repo}/app.bsky.feed.post/{rkey}"
+        record = self.recordCache.get((uri, cid)) if cid else None
+        if record is not None:
+            return copy.deepcopy(record)
+        record = self._repo_getRecord(repo, "app.bsky.feed.post", rkey, cid)
+        if record.get("cid"):
+            cached = copy.deepcopy(record)
+            self.recordCache.set((record["uri"], record["cid"]), cached)
+            self.recordCache.set((uri, record["cid"]), cached) if uri != record["uri"] else None
+        return record
+
+    def getPosts(self, uris: list[str], maxWorkers: int = 4):
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/feed/getPosts.json
+        uris are deduplicated and fetched GET_POSTS_LIMIT at a time, concurrently.
+        returns {"posts": [post views in the order of uris]} without the posts that were not found,
+        or the first error. the records are added to recordCache.
+        """
         if not self.session:
             raise Exception("Not logged in")
-        return self._repo_getRecord(repo, "app.bsky.feed.post", rkey, cid)
+        unique = list(dict.fromkeys(uris))
+        chunks = [unique[i : i + GET_POSTS_LIMIT] for i in range(0, len(unique), GET_POSTS_LIMIT)]
+        if len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=max(1, min(maxWorkers, len(chunks)))) as executor:
+                responses = list(executor.map(self._feed_getPosts, chunks))
+        else:
+            responses = [self._feed_getPosts(chunk) for chunk in chunks]
+        views: dict[str, dict[str, Any]] = {}
+        for response in responses:
+            if "posts" not in response:
+                return response
+            for view in response["posts"]:
+                views[view["uri"]] = view
+                record = {"uri": view["uri"], "cid": view["cid"], "value": copy.deepcopy(view["record"])}
+                self.recordCache.set((view["uri"], view["cid"]), record)
+        return {"posts": [views[uri] for uri in unique if uri in views]}
 
     def post(self, record: dict[str, Any]):
         """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/bsky-agent.ts"""
         if not self.session:
             raise Exception("Not logged in")
-        if not record.get("createdAt"):
-            record.update({"createdAt": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")})
-        if not record.get("$type"):
-            record.update({"$type": "app.bsky.feed.post"})
-        repo = self.session.get("did") or self.session.get("handle") or ""
-        return self._repo_createRecord(repo, "app.bsky.feed.post", record)
+        return self._repo_createRecord(self._repo(), "app.bsky.feed.post", postRecord(record))
+
+    def postThread(
+        self, segments: list[str | dict[str, Any]], reply: dict[str, Any] | None = None, pipeline: bool = True
+    ):
+        """post a thread: each segment (a text or a post record) replies to the previous one.
+        facets of segments without "facets" are detected together, resolving all mentions at once.
+        reply is {"root", "parent"} strong refs to attach the thread to an existing post.
+        with pipeline, rkeys (TIDs) and CIDs are computed locally, so the reply refs are known before
+        anything is sent and the thread goes out with applyWrites (one call per APPLY_WRITES_LIMIT posts).
+        otherwise each post is created after the previous one, from its createRecord response.
+        returns [{"uri", "cid"}] of the posts or raises Exception. if a precomputed ref does not match
+        what the server created, the exception has the server's refs as `results`.
+        """
+        if not self.session:
+            raise Exception("Not logged in")
+        records = [{"text": segment} if isinstance(segment, str) else dict(segment) for segment in segments]
+        detect = [record for record in records if "facets" not in record]
+        facetLists = resolveMentions(self, [detectFacets(record.get("text") or "") for record in detect])
+        for record, facets in zip(detect, facetLists):
+            record.update({"facets": facets}) if facets else None
+        now = datetime.now(timezone.utc)
+        for i, record in enumerate(records):  # 1 ms apart, so clients sort the thread in order
+            if not record.get("createdAt"):
+                createdAt = (now + timedelta(milliseconds=i)).isoformat(timespec="milliseconds")
+                record["createdAt"] = createdAt.replace("+00:00", "Z")
+            postRecord(record)
+        root, parent = (reply["root"], reply["parent"]) if reply else (None, None)
+        if not pipeline:
+            refs = []
+            for record in records:
+                record.update({"reply": {"root": root, "parent": parent}}) if parent else record.pop("reply", None)
+                response = self._repo_createRecord(self._repo(), "app.bsky.feed.post", record)
+                if response.get("error"):
+                    raise Exception(str(response))
+                parent = {"uri": response["uri"], "cid": response["cid"]}
+                root = root or parent
+                refs.append(parent)
+            return refs
+        writes, refs = [], []
+        for record in records:
+            record.update({"reply": {"root": root, "parent": parent}}) if parent else record.pop("reply", None)
+            rkey = nextTid()
+            cid = cidForData(cbor.dumps(cbor.fromJson(record)), DAG_CBOR)
+            parent = {"uri": f"at://{self._repo()}/app.bsky.feed.post/{rkey}", "cid": cid}
+            root = root or parent
+            refs.append(parent)
+            writes.append(
+                {
+                    "$type": "com.atproto.repo.applyWrites#create",
+                    "collection": "app.bsky.feed.post",
+                    "rkey": rkey,
+                    "value": record,
+                }
+            )
+        results = self.applyWrites(writes)["results"]
+        for ref, result in zip(refs, results):
+            if (result.get("uri"), result.get("cid")) != (ref["uri"], ref["cid"]):
+                # the posts were created anyway, the caller needs their refs to fix or delete them
+                created = [{"uri": result.get("uri"), "cid": result.get("cid")} for result in results]
+                error = Exception(f"Precomputed {ref} does not match {result}, created {created}")
+                error.results = created  # type: ignore
+                raise error
+        return refs
 
     def deletePost(self, postUri: str):
         """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/bsky-agent.ts"""
@@ -62,59 +266,366 @@ class BskyAgent:
             raise Exception(f"Invalid postUri format: {postUri}")
         return self._repo_deleteRecord(repo, collection, rkey)
 
-    def uploadBlob(self, data: bytes, encoding: str):
+    def applyWrites(self, writes: list[dict[str, Any]], validate: bool = True):
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/repo/applyWrites.json
+        writes are split into calls of at most APPLY_WRITES_LIMIT. returns {"commit", "results"} or raises Exception.
+        """
+        if not self.session:
+            raise Exception("Not logged in")
+        repo = self._repo()
+        commit: dict[str, str] = {}
+        results: list[dict[str, Any]] = []
+        for i in range(0, len(writes), APPLY_WRITES_LIMIT):
+            response = self._repo_applyWrites(repo, writes[i : i + APPLY_WRITES_LIMIT], validate)
+            if response.get("error"):
+                raise Exception(str(response))
+            commit = response.get("commit") or commit
+            results.extend(response.get("results") or [])
+        return {"commit": commit, "results": results}
+
+    def batch(self, maxWrites: int = APPLY_WRITES_LIMIT, interval: float = 10.0):
+        """Buffer creates/updates/deletes and send them with applyWrites.
+
+        with agent.batch() as batch:
+            batch.post({"text": "Hello"})
+            batch.deletePost(uri)
+        """
+        if not self.session:
+            raise Exception("Not logged in")
+        return BatchWriter(self, maxWrites, interval)
+
+    def iterRecords(
+        self,
+        repo: str,
+        collection: str,
+        limit: int = 100,
+        reverse: bool = False,
+        cursor: str = "",
+        prefetch: bool = False,
+        typed: bool = False,
+    ):
+        """yield records of com.atproto.repo.listRecords across all pages.
+        if prefetch is True, the next page is fetched in a background thread while the current page is consumed.
+        if typed is True, records are yielded as slotted models.Record, which take less memory when kept around.
+        """
+        if not self.session:
+            raise Exception("Not logged in")
+
+        def fetch(cursor: str):
+            return self._repo_listRecords(repo, collection, limit=limit, cursor=cursor, reverse=reverse)
+
+        records = paginate(fetch, "records", cursor, prefetch)
+        return map(Record.fromDict, records) if typed else records
+
+    def iterBlocks(self, limit: int = 100, cursor: str = "", prefetch: bool = False):
+        """yield blocked actors of app.bsky.graph.getBlocks across all pages."""
+        if not self.session:
+            raise Exception("Not logged in")
+
+        def fetch(cursor: str):
+            return self._graph_getBlocks(limit=limit, cursor=cursor)
+
+        return paginate(fetch, "blocks", cursor, prefetch)
+
+    def exportRepo(self, did: str = "", path: str = "", chunkSize: int = 1 << 20):
+        """download a whole repository with com.atproto.sync.getRepo in one request, returns a RepoReader.
+        the CAR is streamed to path (or an anonymous temporary file) and memory-mapped.
+
+        with agent.exportRepo(path="backup.car") as repo:
+            for record in repo.records("app.bsky.feed.post"): ...
+        """
+        if not did and not self.session:
+            raise Exception("Not logged in")
+        response = self._sync_getRepo(did or self.session["did"])
+        try:
+            if response.status_code != 200:
+                raise Exception(str(self.codec.loads(response.content)))
+            f = open(path, "w+b") if path else tempfile.TemporaryFile()
+            try:
+                for chunk in response.iter_content(chunkSize):
+                    f.write(chunk)
+                f.flush()
+                return RepoReader(f)
+            except BaseException:
+                f.close()
+                raise
+        finally:
+            response.close()
+
+    def uploadBlob(self, data: bytes | BinaryIO, encoding: str):
         """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/agent.ts"""
         if not self.session:
             raise Exception("Not logged in")
-        return self._repo_uploadBlob(data, encoding)
+        if self.blobCache is None:
+            return self._repo_uploadBlob(data, encoding)
+        cid = cidForData(data)
+        blob = self.blobCache.get(self._repo(), cid, encoding)
+        if blob:
+            return {"blob": blob}
+        response = self._repo_uploadBlob(data, encoding)
+        if response.get("blob"):
+            self.blobCache.set(self._repo(), cid, encoding, response["blob"])
+        return response
 
     def resolveHandle(self, handle: str):
-        """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/agent.ts"""
+        """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/agent.ts
+        the cache keeps its own copies, so callers may modify the returned response.
+        """
+        if not self.session:
+            raise Exception("Not logged in")
+        key = handle.lower()
+        response = self.handleCache.get(key)
+        if response is not None:
+            return copy.deepcopy(response)
+        response = self._identity_resolveHandle(handle)
+        if response.get("did"):
+            self.handleCache.set(key, copy.deepcopy(response))
+        elif response.get("error") == "InvalidRequest":  # unknown handle, not a transient error
+            self.handleCache.set(key, copy.deepcopy(response), HANDLE_CACHE_NEGATIVE_TTL)
+        return response
+
+    def resolveHandles(self, handles: list[str], maxWorkers: int = 8):
+        """resolve handles concurrently. returns {handle: did}, did is "" if the handle could not be resolved."""
         if not self.session:
             raise Exception("Not logged in")
-        return self._identity_resolveHandle(handle)
+        unique = list(dict.fromkeys(handles))
+        with ThreadPoolExecutor(max_workers=max(1, min(maxWorkers, len(unique)))) as executor:
+            responses = executor.map(self.resolveHandle, unique)
+            return {handle: response.get("did") or "" for handle, response in zip(unique, responses)}
+
+    def getTimeline(self, algorithm: str = "", limit: int = 50, cursor: str = ""):
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/feed/getTimeline.json"""
+        if not self.session:
+            raise Exception("Not logged in")
+        return self.call("app.bsky.feed.getTimeline", {"algorithm": algorithm, "limit": limit, "cursor": cursor})
+
+    def getAuthorFeed(self, actor: str, limit: int = 50, cursor: str = "", filter: str = ""):
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/feed/getAuthorFeed.json"""
+        if not self.session:
+            raise Exception("Not logged in")
+        params = {"actor": actor, "limit": limit, "cursor": cursor, "filter": filter}
+        return self.call("app.bsky.feed.getAuthorFeed", params)
+
+    def getPostThread(self, uri: str, depth: int | None = None, parentHeight: int | None = None):
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/feed/getPostThread.json"""
+        if not self.session:
+            raise Exception("Not logged in")
+        params = {"uri": uri, "depth": depth, "parentHeight": parentHeight}
+        return self.call("app.bsky.feed.getPostThread", params)
+
+    def getProfile(self, actor: str):
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/actor/getProfile.json"""
+        if not self.session:
+            raise Exception("Not logged in")
+        return self.call("app.bsky.actor.getProfile", {"actor": actor})
+
+    def getFollows(self, actor: str, limit: int = 50, cursor: str = ""):
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/graph/getFollows.json"""
+        if not self.session:
+            raise Exception("Not logged in")
+        return self.call("app.bsky.graph.getFollows", {"actor": actor, "limit": limit, "cursor": cursor})
+
+    def getFollowers(self, actor: str, limit: int = 50, cursor: str = ""):
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/graph/getFollowers.json"""
+        if not self.session:
+            raise Exception("Not logged in")
+        return self.call("app.bsky.graph.getFollowers", {"actor": actor, "limit": limit, "cursor": cursor})
+
+    def listNotifications(self, limit: int = 50, cursor: str = "", seenAt: str = ""):
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/notification/listNotifications.json"""
+        if not self.session:
+            raise Exception("Not logged in")
+        params = {"limit": limit, "cursor": cursor, "seenAt": seenAt}
+        return self.call("app.bsky.notification.listNotifications", params)
 
     def uploadImage(self, path: str, alt: str = "", encoding: str = ""):
-        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/embed/images.json"""
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/embed/images.json
+        the file is streamed from disk, not read into memory. with an imageProcessor, the image is first
+        stripped of metadata and fitted under the blob size limit, and its encoding is the processor's.
+        aspectRatio is set if the size of the image is known, i.e. both sides are at least 1 pixel.
+        """
         if not self.session:
             raise Exception("Not logged in")
-        encoding = encoding or guess_type(path)[0] or "application/octet-stream"
-        data = b""
-        with open(path, "rb") as f:
-            data = f.read()
-        response = self._repo_uploadBlob(data, encoding)
+        if self.imageProcessor is not None:
+            data, encoding, width, height = self.imageProcessor(path)
+            size: tuple[int, int] | None = (width, height)
+            response = self.uploadBlob(data, encoding)
+        else:
+            encoding = encoding or guess_type(path)[0] or "application/octet-stream"
+            with open(path, "rb") as f:
+                size = imageSize(f)
+                response = self.uploadBlob(f, encoding)
         blob: dict[str, str] = response.get("blob") or {}
-        if blob is {}:
+        if not blob:
             raise Exception(str(response))
         image: dict[str, Any] = {
             "$type": "app.bsky.embed.images#image",
             "alt": alt,
             "image": blob,
         }
+        if size and size[0] >= 1 and size[1] >= 1:  # a truncated header may read as 0
+            image["aspectRatio"] = {"width": size[0], "height": size[1]}
         return image
 
+    def uploadImages(self, images: list[str | tuple[str, str]], maxWorkers: int = 4):
+        """upload images concurrently and return an app.bsky.embed.images embed.
+        images are paths or (path, alt) tuples, at most MAX_IMAGES.
+        """
+        if not self.session:
+            raise Exception("Not logged in")
+        if len(images) > MAX_IMAGES:
+            raise Exception(f"Too many images: {len(images)} > {MAX_IMAGES}")
+        pathsWithAlt = [(image, "") if isinstance(image, str) else image for image in images]
+        with ThreadPoolExecutor(max_workers=max(1, min(maxWorkers, len(pathsWithAlt)))) as executor:
+            uploaded = list(executor.map(lambda pathWithAlt: self.uploadImage(*pathWithAlt), pathsWithAlt))
+        return {"$type": "app.bsky.embed.images", "images": uploaded}
+
     def uploadExternal(self, uri: str):
-        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/embed/external.json"""
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/embed/external.json
+        link cards are cached by normalized URL for LINK_CARD_CACHE_TTL seconds.
+        """
         if not self.session:
             raise Exception("Not logged in")
-        metadata = getLinkMetaData(uri)
-        external: dict[str, Any] = {
+        key = normalizeUrl(uri)
+        external: dict[str, Any] | None = self.externalCache.get(key)
+        if external is not None:
+            return {**external, "uri": uri}
+        metadata = self.linkMetaCache.get(key)
+        if metadata is None:
+            metadata = getLinkMetaData(uri, self.requests, self.linkMetaEndpoint)
+            self.linkMetaCache.set(key, metadata)
+        external = {
             "$type": "app.bsky.embed.external#external",
             "uri": uri,
             "title": metadata["title"],
             "description": metadata["description"],
         }
         if metadata["data"] and metadata["encoding"]:
-            response = self._repo_uploadBlob(metadata["data"], metadata["encoding"])
+            response = self.uploadBlob(metadata["data"], metadata["encoding"])
             blob: dict[str, str] = response.get("blob") or {}
-            external.update({"thumb": blob}) if blob is not {} else None
-        return external
+            external.update({"thumb": blob}) if blob else None
+        self.externalCache.set(key, external)
+        return {**external}
+
+    def _repo(self):
+        return self.session.get("did") or self.session.get("handle") or ""
+
+    def _call(
+        self,
+        method: str,
+        nsid: str,
+        params: dict[str, Any] | None = None,
+        data: Any = None,
+        headers: dict[str, str] | None = None,
+        auth: bool = True,
+        stream: bool = False,
+    ) -> requests.Response:
+        """send an XRPC request. if the access token has expired, refresh the session and retry once."""
+        accessJwt = self.session.get("accessJwt")
+        position = data.tell() if hasattr(data, "seek") else None
+        response = self._send(method, nsid, params, data, headers, auth, stream)
+        if auth and response.status_code == 400 and self.session.get("refreshJwt") and isExpired(response):
+            with self.refreshLock:
+                if self.session.get("accessJwt") == accessJwt:  # not yet refreshed by another thread
+                    self.refreshSession()
+            data.seek(position) if position is not None else None
+            response = self._send(method, nsid, params, data, headers, auth, stream)
+        return response
+
+    def _send(
+        self,
+        method: str,
+        nsid: str,
+        params: dict[str, Any] | None,
+        data: Any,
+        headers: dict[str, str] | None,
+        auth: bool,
+        stream: bool = False,
+    ) -> requests.Response:
+        """send a request paced by rateLimiter, retrying rate-limited and transient failures with backoff.
+        a procedure (createRecord, applyWrites, ...) is retried only after a 429 or 503, or a connection error
+        before anything was sent, so it is never processed twice. queries are also retried after a 502 or 504
+        or any connection error.
+        """
+        position = data.tell() if hasattr(data, "seek") else None
+        url = self.urls.get(nsid) or self.urls.setdefault(nsid, f"{self.service}/xrpc/{nsid}")
+        attempt = 0
+        while True:
+            self.rateLimiter.wait()
+            data.seek(position) if position is not None else None
+            h = ({**headers, **self.headers} if headers else self.headers) if auth else headers
+            retries = attempt < self.rateLimiter.maxRetries
+            self._runHooks("request", method, nsid, params)
+            started = time.perf_counter()
+            try:
+                response = self.requests.request(method, url, params=params, data=data, headers=h, stream=stream)
+            except requests.ConnectionError as e:
+                self._runHooks("response", nsid, None, time.perf_counter() - started, attempt)
+                if not retries or not (method == "GET" or notSent(e)):
+                    raise
+                time.sleep(self.rateLimiter.retryDelay(attempt))
+                attempt += 1
+                continue
+            self._runHooks("response", nsid, response, time.perf_counter() - started, attempt)
+            self.rateLimiter.update(response.status_code, response.headers)
+            retryable = RETRY_STATUS_CODES if method == "GET" else PROCEDURE_RETRY_STATUS_CODES
+            if response.status_code not in retryable or not retries:
+                return response
+            # a 429 waits for the window to reset in rateLimiter.wait(), the others back off here
+            time.sleep(self.rateLimiter.retryDelay(attempt)) if response.status_code != 429 else None
+            attempt += 1
+
+    def _runHooks(self, name: str, *args: Any):
+        for hook in self.hooks[name]:
+            try:
+                hook(self, *args)
+            except Exception:
+                logger.exception("%s hook %r failed", name, hook)
+
+    def request(
+        self,
+        nsid: str,
+        params: dict[str, Any] | None = None,
+        body: Any = None,
+        headers: dict[str, str] | None = None,
+        auth: bool = True,
+        stream: bool = False,
+    ) -> requests.Response:
+        """send the XRPC method nsid as ENDPOINTS describes it, returns the response.
+        unset ("" or None) parameters and top-level JSON input fields are left out.
+        """
+        endpoint = getEndpoint(nsid, body is not None)
+        if endpoint.input == JSON and isinstance(body, dict):
+            body = self.codec.dumps(compact(body))
+            headers = {**(headers or {}), "Content-Type": JSON}
+        params = queryParams(params) if params else None
+        return self._call(endpoint.method, nsid, params, data=body, headers=headers, auth=auth, stream=stream)
+
+    def call(
+        self,
+        nsid: str,
+        params: dict[str, Any] | None = None,
+        body: Any = None,
+        headers: dict[str, str] | None = None,
+        auth: bool = True,
+    ) -> Any:
+        """call the XRPC method nsid and return the decoded JSON output (also for errors).
+
+        agent.call("app.bsky.actor.getProfile", {"actor": "nanoatp.bsky.social"})
+        """
+        response = self.request(nsid, params, body, headers, auth)
+        return self.codec.loads(response.content) if response.content else {}
 
     def _server_createSession(self, identifier: str, password: str) -> dict[str, Any]:
         """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/server/createSession.json"""
-        json = {"identifier": identifier, "password": password}
-        response = self.requests.post(f"{self.service}/xrpc/com.atproto.server.createSession", json=json)
-        return response.json()
+        return self.call(
+            "com.atproto.server.createSession", body={"identifier": identifier, "password": password}, auth=False
+        )
+
+    def _server_refreshSession(self, refreshJwt: str) -> dict[str, Any]:
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/server/refreshSession.json"""
+        headers = {"Authorization": f"Bearer {refreshJwt}"}
+        return self.call("com.atproto.server.refreshSession", headers=headers, auth=False)
 
     def _repo_createRecord(
         self,
@@ -126,35 +637,48 @@ class BskyAgent:
         swapCommit: str = "",
     ) -> dict[str, str]:
         """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/repo/createRecord.json"""
-        json: dict[str, str | bool | dict[str, Any]] = {"repo": repo, "collection": collection, "record": record}
-        json.update({"rkey": rkey}) if rkey != "" else None
-        json.update({"validate": validate}) if not validate else None  # default is True
-        json.update({"swapCommit": swapCommit}) if swapCommit != "" else None
-        response = self.requests.post(
-            f"{self.service}/xrpc/com.atproto.repo.createRecord", headers=self.headers, json=json
-        )
-        return response.json()
+        body = {"repo": repo, "collection": collection, "record": record, "rkey": rkey}
+        body.update({"validate": validate, "swapCommit": swapCommit})
+        response = self.call("com.atproto.repo.createRecord", body=body)
+        self._forgetMissingBlobs(response, record)
+        return response
+
+    def _repo_applyWrites(
+        self, repo: str, writes: list[dict[str, Any]], validate: bool = True, swapCommit: str = ""
+    ) -> dict[str, Any]:
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/repo/applyWrites.json"""
+        body = {"repo": repo, "writes": writes, "validate": validate, "swapCommit": swapCommit}
+        response = self.call("com.atproto.repo.applyWrites", body=body)
+        self._forgetMissingBlobs(response, writes)
+        return response
+
+    def _forgetMissingBlobs(self, response: dict[str, Any], value: Any):
+        """a write rejected for a blob the PDS could not find (e.g. garbage-collected) drops the cached refs of
+        the blobs in value, so they are uploaded again next time.
+        """
+        if self.blobCache is None or not response.get("error"):
+            return
+        if "blob" in (response.get("message") or "").lower():
+            for cid in blobCids(value):
+                self.blobCache.delete(self._repo(), cid)
 
     def _repo_getRecord(self, repo: str, collection: str, rkey: str, cid: str = "") -> dict[str, Any]:
         """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/repo/getRecord.json"""
-        params = {"repo": repo, "collection": collection, "rkey": rkey}
-        params.update({"cid": cid}) if cid != "" else None
-        response = self.requests.get(
-            f"{self.service}/xrpc/com.atproto.repo.getRecord", headers=self.headers, params=params
-        )
-        return response.json()
+        params = {"repo": repo, "collection": collection, "rkey": rkey, "cid": cid}
+        return self.call("com.atproto.repo.getRecord", params)
 
     def _repo_deleteRecord(
         self, repo: str, collection: str, rkey: str, swapRecord: str = "", swapCommit: str = ""
     ) -> requests.Response:
         """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/repo/deleteRecord.json"""
-        json = {"repo": repo, "collection": collection, "rkey": rkey}
-        json.update({"swapRecord": swapRecord}) if swapRecord != "" else None
-        json.update({"swapCommit": swapCommit}) if swapCommit != "" else None
-        response = self.requests.post(
-            f"{self.service}/xrpc/com.atproto.repo.deleteRecord", headers=self.headers, json=json
-        )
-        return response  # TODO
+        body = {
+            "repo": repo,
+            "collection": collection,
+            "rkey": rkey,
+            "swapRecord": swapRecord,
+            "swapCommit": swapCommit,
+        }
+        return self.request("com.atproto.repo.deleteRecord", body=body)  # TODO
 
     def _repo_listRecords(
         self,
@@ -167,57 +691,124 @@ class BskyAgent:
         reverse: bool = False,
     ) -> dict[str, Any]:
         """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/repo/listRecords.json"""
-        params: dict[str, str | int | bool] = {"repo": repo, "collection": collection}
-        params.update({"limit": limit}) if limit != 50 else None  # 1 <= limit <= 100
-        params.update({"cursor": cursor}) if cursor != "" else None
-        params.update({"rkeyStart": rkeyStart}) if rkeyStart != "" else None
-        params.update({"rkeyEnd": rkeyEnd}) if rkeyEnd != "" else None
-        params.update({"reverse": reverse}) if reverse else None  # default is False
-        response = self.requests.get(
-            f"{self.service}/xrpc/com.atproto.repo.listRecords", headers=self.headers, params=params
-        )
-        return response.json()
+        params = {"repo": repo, "collection": collection, "limit": limit, "cursor": cursor}  # 1 <= limit <= 100
+        params.update({"rkeyStart": rkeyStart, "rkeyEnd": rkeyEnd, "reverse": reverse or None})
+        return self.call("com.atproto.repo.listRecords", params)
 
-    def _repo_uploadBlob(self, data: bytes, encoding: str) -> dict[str, Any]:
-        """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/repo/uploadBlob.json"""
-        headers = {"Content-Type": encoding, "Content-Length": str(len(data))}
-        headers.update(self.headers)
-        response = self.requests.post(f"{self.service}/xrpc/com.atproto.repo.uploadBlob", headers=headers, data=data)
-        return response.json()
+    def _repo_uploadBlob(self, data: bytes | BinaryIO, encoding: str) -> dict[str, Any]:
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/repo/uploadBlob.json
+        data can be a binary file object, which is streamed from its current position.
+        """
+        size = len(data) if isinstance(data, bytes) else remainingSize(data)
+        headers = {"Content-Type": encoding, "Content-Length": str(size)}
+        return self.call("com.atproto.repo.uploadBlob", body=data, headers=headers)
 
     def _identity_resolveHandle(self, handle: str) -> dict[str, str]:
         """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/identity/resolveHandle.json"""
-        params = {"handle": handle}
-        response = self.requests.get(
-            f"{self.service}/xrpc/com.atproto.identity.resolveHandle", headers=self.headers, params=params
-        )
-        return response.json()
+        return self.call("com.atproto.identity.resolveHandle", {"handle": handle})
+
+    def _sync_getRepo(self, did: str, since: str = "") -> requests.Response:
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/com/atproto/sync/getRepo.json
+        returns the streamed response, whose body is a CAR file.
+        """
+        return self.request("com.atproto.sync.getRepo", {"did": did, "since": since}, stream=True)
+
+    def _feed_getPosts(self, uris: list[str]) -> dict[str, Any]:
+        """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/feed/getPosts.json"""
+        return self.call("app.bsky.feed.getPosts", {"uris": uris})
 
     def _graph_getBlocks(self, limit: int = 50, cursor: str = "") -> dict[str, Any]:
         """https://github.com/bluesky-social/atproto/blob/main/lexicons/app/bsky/graph/getBlocks.json"""
-        params: dict[str, str | int] = {}
-        params.update({"limit": limit}) if limit != 50 else None  # 1 <= limit <= 100
-        params.update({"cursor": cursor}) if cursor != "" else None
-        response = self.requests.get(
-            f"{self.service}/xrpc/app.bsky.graph.getBlocks", headers=self.headers, params=params
-        )
-        return response.json()
+        return self.call("app.bsky.graph.getBlocks", {"limit": limit, "cursor": cursor})
+
+
+def isExpired(response: requests.Response):
+    try:
+        return response.json().get("error") == "ExpiredToken"
+    except ValueError:
+        return False
+
+
+def notSent(e: requests.ConnectionError):
+    """whether the connection failed before any of the request was sent (connect timeout, refused, DNS)."""
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def blobCids(value: Any) -> Iterator[str]:
+    """the CIDs of the blob refs ({"$type": "blob", "ref": {"$link": cid}, ...}) anywhere in a JSON value."""
+    if isinstance(value, dict):
+        if value.get("$type") == "blob" and isinstance(value.get("ref"), dict):
+            yield value["ref"].get("$link") or ""
+            return
+        for item in value.values():
+            yield from blobCids(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from blobCids(item)
+
+
+def remainingSize(f: BinaryIO):
+    """bytes from the current position of f to its end. the position is restored."""
+    position = f.tell()
+    try:
+        return fstat(f.fileno()).st_size - position
+    except (AttributeError, OSError):  # in-memory streams such as BytesIO have no file descriptor
+        size = f.seek(0, 2)
+        f.seek(position)
+        return size - position
+
+
+def postRecord(record: dict[str, Any]):
+    """fill in "createdAt" and "$type" of an app.bsky.feed.post record in place."""
+    if not record.get("createdAt"):
+        record.update({"createdAt": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")})
+    if not record.get("$type"):
+        record.update({"$type": "app.bsky.feed.post"})
+    return record
+
+
+def paginate(fetch: Callable[[str], dict[str, Any]], key: str, cursor: str = "", prefetch: bool = False):
+    """yield items of response[key] while following response["cursor"]. raises Exception on error response."""
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        future = executor.submit(fetch, cursor) if executor else None
+        while True:
+            response = future.result() if future else fetch(cursor)
+            if response.get("error"):
+                raise Exception(str(response))
+            items = response.get(key) or []
+            cursor = response.get("cursor") or ""
+            # an empty page ends the iteration even if a cursor is returned
+            more = bool(cursor and items)
+            future = executor.submit(fetch, cursor) if executor and more else None
+            yield from items
+            if not more:
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True) if executor else None
 
 
-def parseAtUri(uri: str):
-    """https://github.com/bluesky-social/atproto/blob/main/packages/uri/src/index.ts"""
-    u = urlparse(uri)
-    repo = u.netloc
-    _, collection, rkey = u.path.split("/")
-    return repo, collection, rkey
+def normalizeUrl(uri: str):
+    """normalize a URL for use as a cache key: lowercase scheme and host, no default port, no fragment."""
+    u = urlsplit(uri.strip())
+    scheme = u.scheme.lower()
+    netloc = u.netloc.lower()
+    if (scheme, netloc.rpartition(":")[2]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rpartition(":")[0]
+    return urlunsplit((scheme, netloc, u.path or "/", u.query, ""))
 
 
-def getLinkMetaData(uri: str) -> dict[str, str | bytes]:
+def getLinkMetaData(
+    uri: str, session: requests.Session | None = None, endpoint: str = LINK_META_ENDPOINT
+) -> dict[str, str | bytes]:
     """https://cardyb.bsky.app/v1/extract?url={quote(uri)}
     returns {"error", "likely_type", "url", "title", "description", "image", "data", "encoding"}
-    or raises Exception.
+    or raises Exception. pass session to reuse its pooled connections.
     """
-    response = requests.get(f"https://cardyb.bsky.app/v1/extract?url={quote(uri)}")
+    response = (session or requests).get(endpoint, params={"url": uri})
     if response.status_code != 200:
         raise Exception(f"HTTP status code {response.status_code}")
     json = response.json()
@@ -227,7 +818,7 @@ def getLinkMetaData(uri: str) -> dict[str, str | bytes]:
     json.update({"encoding": ""})
     if json["image"]:  # should be https://cardyb.bsky.app/v1/image?url=...
         try:
-            image_data = getImageData(json["image"])
+            image_data = getImageData(json["image"], session=session)
         except Exception:
             return json  # no image data
         json.update({"data": image_data["data"]})
@@ -235,12 +826,14 @@ def getLinkMetaData(uri: str) -> dict[str, str | bytes]:
     return json
 
 
-def getImageData(uri: str, chunk_size: int = 8192) -> dict[str, str | bytes]:
+def getImageData(uri: str, chunk_size: int = 8192, session: requests.Session | None = None) -> dict[str, str | bytes]:
     """uri should be https://cardyb.bsky.app/v1/image?url=...
     returns {"data", "encoding"} or raises Exception.
     """
+    response = None
+    buffer = None
     try:
-        response = requests.get(uri, stream=True)
+        response = (session or requests).get(uri, stream=True)
         if response.status_code != 200:
             raise Exception(f"HTTP status code {response.status_code}")
         buffer = BytesIO()
@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after they are set (never if ttl is None)."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key: Hashable):
+        return self.get(key, self) is not self
+
+    def get(self, key: Hashable, default: Any = None):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self.data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        with self.lock:
+            self.data[key] = (None if ttl is None else time.monotonic() + ttl, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None):
+        with self.lock:
+            entry = self.data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
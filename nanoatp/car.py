@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+from typing import BinaryIO, Iterator
+
+from . import cbor
+from .cid import CID, readVarint, varint
+
+
+def decodeCar(data: bytes):
+    """https://ipld.io/specs/transport/car/carv1/ returns (roots, {cid: block bytes}) of a CAR held in memory."""
+    roots, pos = readCarHeader(data)
+    blocks: dict[CID, bytes] = {}
+    while pos < len(data):
+        length, pos = readVarint(data, pos)
+        cid, start = CID.parse(data, pos)
+        pos += length
+        blocks[cid] = bytes(data[start:pos])
+    return roots, blocks
+
+
+def readCarHeader(data: bytes, pos: int = 0):
+    """returns (roots, position of the first block)."""
+    length, pos = readVarint(data, pos)
+    header, _ = cbor.loads(data, pos)
+    if header.get("version") != 1:
+        raise ValueError(f"unsupported CAR version: {header.get('version')}")
+    return list(header.get("roots") or []), pos + length
+
+
+def _readVarint(stream: BinaryIO):
+    n = shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise EOFError("truncated varint")
+            return None
+        n |= (byte[0] & 0x7F) << shift
+        if not byte[0] & 0x80:
+            return n
+        shift += 7
+
+
+def _readExactly(stream: BinaryIO, n: int):
+    data = stream.read(n)
+    while len(data) < n:
+        chunk = stream.read(n - len(data))
+        if not chunk:
+            raise EOFError("truncated CAR")
+        data += chunk
+    return data
+
+
+class CarReader:
+    """read a CAR from a binary stream (e.g. an HTTP response) one block at a time, without holding it in memory.
+
+    reader = CarReader(stream)
+    reader.roots
+    for cid, data in reader: ...
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        length = _readVarint(stream)
+        if length is None:
+            raise EOFError("empty CAR")
+        self.roots, _ = readCarHeader(varint(length) + _readExactly(stream, length))
+
+    def __iter__(self) -> Iterator[tuple[CID, bytes]]:
+        while True:
+            length = _readVarint(self.stream)
+            if length is None:
+                return
+            section = _readExactly(self.stream, length)
+            cid, start = CID.parse(section)
+            yield cid, section[start:]
+
+
+def encodeCar(roots: list[CID], blocks: list[tuple[CID, bytes]]):
+    """encode a CARv1, e.g. for tests."""
+    header = cbor.dumps({"version": 1, "roots": roots})
+    out = bytearray(varint(len(header)) + header)
+    for cid, data in blocks:
+        out += varint(len(cid.bytes) + len(data)) + cid.bytes + data
+    return bytes(out)
@@ -0,0 +1,167 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import struct
+from base64 import b64decode, b64encode
+from typing import Any
+
+from .cid import CID
+
+CID_TAG = 42
+
+
+def loads(data: bytes, pos: int = 0):
+    """https://ipld.io/specs/codecs/dag-cbor/spec/ decode one DAG-CBOR value at pos, returns (value, next position).
+    links (tag 42) are decoded as CID.
+    """
+    initial = data[pos]
+    major, info = initial >> 5, initial & 0x1F
+    pos += 1
+    if info < 24:
+        n = info
+    elif info == 24:
+        n = data[pos]
+        pos += 1
+    elif info == 25:
+        n = (data[pos] << 8) | data[pos + 1]
+        pos += 2
+    elif info == 26:
+        n = struct.unpack_from(">I", data, pos)[0]
+        pos += 4
+    elif info == 27:
+        n = struct.unpack_from(">Q", data, pos)[0]
+        pos += 8
+    else:
+        raise ValueError(f"unsupported additional info {info} at {pos - 1}")
+    if major == 0:
+        return n, pos
+    if major == 1:
+        return -1 - n, pos
+    if major == 2:
+        return bytes(data[pos : pos + n]), pos + n
+    if major == 3:
+        return bytes(data[pos : pos + n]).decode(), pos + n
+    if major == 4:
+        items = []
+        for _ in range(n):
+            item, pos = loads(data, pos)
+            items.append(item)
+        return items, pos
+    if major == 5:
+        obj = {}
+        for _ in range(n):
+            key, pos = loads(data, pos)
+            obj[key], pos = loads(data, pos)
+        return obj, pos
+    if major == 6:
+        value, pos = loads(data, pos)
+        if n != CID_TAG:
+            raise ValueError(f"unsupported tag {n}")
+        return CID(value[1:]), pos  # skip the multibase identity prefix 0x00
+    # major 7
+    if info == 20:
+        return False, pos
+    if info == 21:
+        return True, pos
+    if info == 22:
+        return None, pos
+    if info == 25:
+        return struct.unpack(">e", n.to_bytes(2, "big"))[0], pos
+    if info == 26:
+        return struct.unpack(">f", n.to_bytes(4, "big"))[0], pos
+    if info == 27:
+        return struct.unpack(">d", n.to_bytes(8, "big"))[0], pos
+    raise ValueError(f"unsupported simple value {info}")
+
+
+def loadsAll(data: bytes):
+    """decode a sequence of concatenated DAG-CBOR values, e.g. a firehose frame (header + body)."""
+    values = []
+    pos = 0
+    while pos < len(data):
+        value, pos = loads(data, pos)
+        values.append(value)
+    return values
+
+
+def _head(major: int, n: int):
+    if n < 24:
+        return bytes([major << 5 | n])
+    if n < 0x100:
+        return bytes([major << 5 | 24, n])
+    if n < 0x10000:
+        return bytes([major << 5 | 25]) + n.to_bytes(2, "big")
+    if n < 0x100000000:
+        return bytes([major << 5 | 26]) + n.to_bytes(4, "big")
+    return bytes([major << 5 | 27]) + n.to_bytes(8, "big")
+
+
+def _dump(value: Any, out: bytearray):
+    if value is None:
+        out.append(0xF6)
+    elif value is True:
+        out.append(0xF5)
+    elif value is False:
+        out.append(0xF4)
+    elif isinstance(value, int):
+        out += _head(0, value) if value >= 0 else _head(1, -1 - value)
+    elif isinstance(value, str):
+        encoded = value.encode()
+        out += _head(3, len(encoded)) + encoded
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out += _head(2, len(value)) + bytes(value)
+    elif isinstance(value, CID):
+        out += _head(6, CID_TAG) + _head(2, len(value.bytes) + 1) + b"\x00" + value.bytes
+    elif isinstance(value, (list, tuple)):
+        out += _head(4, len(value))
+        for item in value:
+            _dump(item, out)
+    elif isinstance(value, dict):
+        # canonical order: shorter keys first, then bytewise
+        keys = sorted((key.encode(), key) for key in value)
+        keys.sort(key=lambda k: len(k[0]))
+        out += _head(5, len(keys))
+        for encoded, key in keys:
+            out += _head(3, len(encoded)) + encoded
+            _dump(value[key], out)
+    elif isinstance(value, float):
+        out += b"\xfb" + struct.pack(">d", value)
+    else:
+        raise TypeError(f"cannot encode {type(value).__name__} as DAG-CBOR")
+
+
+def dumps(value: Any):
+    """encode a value as canonical DAG-CBOR (map keys sorted by length then bytes)."""
+    out = bytearray()
+    _dump(value, out)
+    return bytes(out)
+
+
+def toJson(value: Any) -> Any:
+    """https://atproto.com/specs/data-model convert decoded DAG-CBOR to the JSON representation:
+    CID -> {"$link": "bafy..."} and bytes -> {"$bytes": base64}.
+    """
+    if isinstance(value, dict):
+        return {key: toJson(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [toJson(item) for item in value]
+    if isinstance(value, CID):
+        return {"$link": str(value)}
+    if isinstance(value, bytes):
+        return {"$bytes": b64encode(value).decode().rstrip("=")}
+    return value
+
+
+def fromJson(value: Any) -> Any:
+    """inverse of toJson, e.g. to encode a record fetched as JSON."""
+    if isinstance(value, dict):
+        if len(value) == 1 and isinstance(value.get("$link"), str):
+            return CID.decode(value["$link"])
+        if len(value) == 1 and isinstance(value.get("$bytes"), str):
+            return b64decode(value["$bytes"] + "=" * (-len(value["$bytes"]) % 4))
+        return {key: fromJson(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fromJson(item) for item in value]
+    return value
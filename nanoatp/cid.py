@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+from base64 import b32decode, b32encode
+from hashlib import sha256
+from typing import BinaryIO
+
+RAW = 0x55  # multicodec of blobs
+DAG_CBOR = 0x71  # multicodec of records
+SHA2_256 = 0x12  # multihash
+
+
+def varint(n: int):
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def cidBytes(digest: bytes, codec: int = RAW):
+    """binary CIDv1 of a sha256 digest."""
+    return varint(1) + varint(codec) + varint(SHA2_256) + varint(len(digest)) + digest
+
+
+def cidString(digest: bytes, codec: int = RAW):
+    """https://github.com/multiformats/cid base32 CIDv1 string, e.g. bafkrei... for blobs."""
+    return "b" + b32encode(cidBytes(digest, codec)).decode().lower().rstrip("=")
+
+
+def cidForData(data: bytes | BinaryIO, codec: int = RAW, chunkSize: int = 1 << 16):
+    """CIDv1 string of bytes or of a binary file object read from its current position (then rewound)."""
+    if isinstance(data, bytes):
+        return cidString(sha256(data).digest(), codec)
+    position = data.tell()
+    h = sha256()
+    for chunk in iter(lambda: data.read(chunkSize), b""):
+        h.update(chunk)
+    data.seek(position)
+    return cidString(h.digest(), codec)
+
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def readVarint(data: bytes, pos: int = 0):
+    """returns (value, next position)."""
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return n, pos
+        shift += 7
+
+
+class CID:
+    """https://github.com/multiformats/cid a binary CID. str() gives the canonical string form."""
+
+    __slots__ = ("bytes",)
+
+    def __init__(self, data: bytes):
+        self.bytes = bytes(data)
+
+    @classmethod
+    def parse(cls, data: bytes, pos: int = 0):
+        """read a binary CID at pos, returns (CID, next position)."""
+        if data[pos] == 0x12 and data[pos + 1] == 0x20:  # CIDv0 is a bare sha2-256 multihash
+            return cls(data[pos : pos + 34]), pos + 34
+        start = pos
+        _, pos = readVarint(data, pos)  # version
+        _, pos = readVarint(data, pos)  # codec
+        _, pos = readVarint(data, pos)  # multihash code
+        length, pos = readVarint(data, pos)
+        return cls(data[start : pos + length]), pos + length
+
+    @classmethod
+    def decode(cls, s: str):
+        """parse a base32 CIDv1 string (b...)."""
+        if not s.startswith("b"):
+            raise ValueError(f"unsupported multibase: {s}")
+        body = s[1:].upper()
+        return cls(b32decode(body + "=" * (-len(body) % 8)))
+
+    @property
+    def codec(self):
+        if self.bytes[0] == 0x12:
+            return 0x70  # CIDv0 is always dag-pb
+        _, pos = readVarint(self.bytes)
+        return readVarint(self.bytes, pos)[0]
+
+    def __str__(self):
+        if self.bytes[0] == 0x12:
+            n = int.from_bytes(self.bytes, "big")
+            out = ""
+            while n:
+                n, r = divmod(n, 58)
+                out = BASE58_ALPHABET[r] + out
+            return out
+        return "b" + b32encode(self.bytes).decode().lower().rstrip("=")
+
+    def __repr__(self):
+        return f"CID({str(self)!r})"
+
+    def __eq__(self, other: object):
+        return isinstance(other, CID) and self.bytes == other.bytes
+
+    def __hash__(self):
+        return hash(self.bytes)
@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+PREFERENCE = ("orjson", "msgspec", "json")  # fastest first
+
+
+class Codec:
+    """a JSON backend: loads() takes the raw response bytes, dumps() returns the request body bytes."""
+
+    __slots__ = ("name", "loads", "dumps")
+
+    def __init__(self, name: str, loads: Callable[[bytes], Any], dumps: Callable[[Any], bytes]):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self):
+        return f"Codec({self.name!r})"
+
+
+def _orjson():
+    import orjson
+
+    return Codec("orjson", orjson.loads, orjson.dumps)
+
+
+def _msgspec():
+    import msgspec
+
+    return Codec("msgspec", msgspec.json.decode, msgspec.json.encode)
+
+
+def _json():
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    return Codec("json", json.loads, lambda value: encoder.encode(value).encode())
+
+
+CODECS: dict[str, Callable[[], Codec]] = {"orjson": _orjson, "msgspec": _msgspec, "json": _json}
+_default: Codec | None = None
+
+
+def getCodec(name: str = ""):
+    """the named codec, or the fastest one installed (orjson, msgspec, then the stdlib json)."""
+    global _default
+    if name:
+        return CODECS[name]()
+    if _default is None:
+        for candidate in PREFERENCE:
+            try:
+                _default = CODECS[candidate]()
+                break
+            except ImportError:
+                continue
+    return _default  # type: ignore
@@ -0,0 +1,149 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Iterator
+
+from . import cbor
+from .car import decodeCar
+from .websocket import WebSocket
+
+FIREHOSE_SERVICE = "wss://bsky.network"
+SUBSCRIBE_REPOS = "com.atproto.sync.subscribeRepos"
+
+
+def decodeFrame(frame: bytes, decodeRecords: bool = True) -> dict[str, Any]:
+    """https://atproto.com/specs/event-stream decode a frame (header + body) into a typed event,
+    e.g. {"$type": "com.atproto.sync.subscribeRepos#commit", "seq": ..., "repo": ..., "ops": [...]}.
+    for #commit, each create/update op gets the decoded record from the CAR blocks as "record".
+    """
+    header, body = cbor.loadsAll(frame)[:2]
+    if header.get("op") == -1:
+        raise Exception(f"{body.get('error')}: {body.get('message')}")
+    blocks = body.pop("blocks", None)
+    ops = body.pop("ops", None)
+    event = {"$type": f"{SUBSCRIBE_REPOS}{header.get('t')}", **cbor.toJson(body)}
+    if ops is not None:
+        _, records = decodeCar(blocks) if blocks and decodeRecords else ([], {})
+        event["ops"] = []
+        for op in ops:
+            item = cbor.toJson(op)
+            if op.get("cid") in records:
+                item["record"] = cbor.toJson(cbor.loads(records[op["cid"]])[0])
+            event["ops"].append(item)
+    return event
+
+
+class Firehose:
+    """com.atproto.sync.subscribeRepos subscriber.
+
+    for event in Firehose():  # or: async for event in Firehose()
+        ...
+
+    `cursor` holds the seq of the last event yielded; reconnects resume from it. A frame that cannot be
+    decoded raises ValueError instead of reconnecting, as the server would send the same frame again.
+    Frames are read from the socket only as events are consumed, so a slow consumer slows the stream
+    instead of buffering it. The async iterator decodes on a background thread and buffers at most
+    `maxQueue` events.
+    """
+
+    def __init__(
+        self,
+        service: str = FIREHOSE_SERVICE,
+        cursor: int | None = None,
+        reconnect: bool = True,
+        decodeRecords: bool = True,
+        maxQueue: int = 1000,
+        backoff: float = 0.5,
+        maxBackoff: float = 60.0,
+    ):
+        self.service = service.rstrip("/")
+        self.cursor = cursor
+        self.reconnect = reconnect
+        self.decodeRecords = decodeRecords
+        self.maxQueue = maxQueue
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.closed = False
+        self.ws: WebSocket | None = None
+
+    def url(self):
+        query = f"?cursor={self.cursor}" if self.cursor is not None else ""
+        return f"{self.service}/xrpc/{SUBSCRIBE_REPOS}{query}"
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        self.closed = False
+        retries = 0
+        while not self.closed:
+            try:
+                self.ws = WebSocket(self.url())
+                while (frame := self.ws.recv()) is not None:
+                    if isinstance(frame, str):
+                        continue
+                    try:
+                        event = decodeFrame(frame, self.decodeRecords)
+                    except (ValueError, EOFError, IndexError, KeyError, TypeError, AttributeError) as e:
+                        # a malformed frame, not a dropped connection: a reconnect would get the same frame
+                        raise ValueError(f"Cannot decode the frame after seq {self.cursor}: {e!r}") from e
+                    retries = 0
+                    if isinstance(event.get("seq"), int):
+                        self.cursor = event["seq"]
+                    yield event
+            except (OSError, EOFError):
+                if self.closed:
+                    return
+                if not self.reconnect:
+                    raise
+            finally:
+                if self.ws is not None:
+                    self.ws.close()
+            if self.closed or not self.reconnect:
+                return
+            time.sleep(min(self.backoff * 2**retries, self.maxBackoff))
+            retries += 1
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[Any] = asyncio.Queue()
+        slots = threading.Semaphore(self.maxQueue)
+        done = object()
+
+        def produce():
+            try:
+                for event in self:
+                    while not slots.acquire(timeout=0.1):
+                        if self.closed:
+                            return
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+                    if self.closed:
+                        return
+            except BaseException as e:
+                put(e)
+            finally:
+                put(done)
+
+        def put(item: Any):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:  # the loop is already closed
+                pass
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while (item := await queue.get()) is not done:
+                slots.release()
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        self.closed = True
+        if self.ws is not None:
+            self.ws.close()
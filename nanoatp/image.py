@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, BinaryIO
+
+MAX_IMAGE_SIZE = 1000000  # bytes, maxSize of app.bsky.embed.images#image
+MAX_IMAGE_DIMENSION = 2000  # pixels, the longest side the Bluesky app displays
+JPEG_QUALITIES = (90, 80, 70, 60)  # tried in order before an image is downsized further
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def imageSize(f: BinaryIO) -> tuple[int, int] | None:
+    """(width, height) as displayed, read from the headers of a PNG, JPEG, GIF or WebP file, or None.
+    the EXIF orientation of JPEG files is taken into account. the file position is restored.
+    """
+    position = f.tell()
+    try:
+        head = f.read(30)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return int.from_bytes(head[6:8], "little"), int.from_bytes(head[8:10], "little")
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webpSize(head)
+        if head[:2] == b"\xff\xd8":
+            f.seek(position + 2)
+            return _jpegSize(f)
+        return None
+    finally:
+        f.seek(position)
+
+
+def _webpSize(head: bytes):
+    chunk = head[12:16]
+    if chunk == b"VP8 ":  # lossy
+        return int.from_bytes(head[26:28], "little") & 0x3FFF, int.from_bytes(head[28:30], "little") & 0x3FFF
+    if chunk == b"VP8L":  # lossless
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, (bits >> 14 & 0x3FFF) + 1
+    if chunk == b"VP8X":  # extended
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _jpegSize(f: BinaryIO):
+    orientation = 1
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF:  # fill byte
+            f.seek(-1, 1)
+            continue
+        if marker[1] == 0x01 or 0xD0 <= marker[1] <= 0xD8:  # no length
+            continue
+        length = int.from_bytes(f.read(2), "big")
+        if marker[1] == 0xE1:
+            segment = f.read(length - 2)
+            if segment.startswith(b"Exif\0\0"):
+                orientation = _exifOrientation(segment[6:])
+        elif marker[1] in SOF_MARKERS:
+            segment = f.read(5)
+            height, width = int.from_bytes(segment[1:3], "big"), int.from_bytes(segment[3:5], "big")
+            return (height, width) if orientation >= 5 else (width, height)  # 5-8 are rotated by 90 degrees
+        else:
+            f.seek(length - 2, 1)
+
+
+def _exifOrientation(tiff: bytes):
+    """the Orientation tag (0x0112) of IFD0, 1 if there is none."""
+    order = "little" if tiff[:2] == b"II" else "big"
+    try:
+        ifd = int.from_bytes(tiff[4:8], order)
+        for i in range(int.from_bytes(tiff[ifd : ifd + 2], order)):
+            entry = tiff[ifd + 2 + i * 12 : ifd + 14 + i * 12]
+            if int.from_bytes(entry[0:2], order) == 0x0112:
+                return int.from_bytes(entry[8:10], order)
+    except (IndexError, ValueError):
+        pass
+    return 1
+
+
+def prepareImage(path: str, maxSize: int = MAX_IMAGE_SIZE, maxDimension: int = MAX_IMAGE_DIMENSION):
+    """fit an image for upload: rotated upright, metadata (EXIF, GPS) stripped, the longest side at most
+    maxDimension and at most maxSize bytes. images that already fit and have no EXIF are returned as they are.
+    returns (data, encoding, width, height). requires Pillow (pip install nanoatp[image]).
+    """
+    from PIL import Image, ImageOps
+
+    with open(path, "rb") as f:
+        data = f.read()
+    with Image.open(BytesIO(data)) as image:
+        encoding = Image.MIME.get(image.format or "", "")
+        clean = not image.getexif() and encoding in ("image/jpeg", "image/png", "image/webp", "image/gif")
+        if clean and len(data) <= maxSize and max(image.size) <= maxDimension:
+            return data, encoding, *image.size
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((maxDimension, maxDimension), Image.Resampling.LANCZOS)
+        alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if not alpha and image.mode != "RGB":
+            image = image.convert("RGB")
+        while True:
+            for quality in (None,) if alpha else JPEG_QUALITIES:
+                out = BytesIO()
+                if alpha:
+                    image.save(out, "PNG", optimize=True)
+                else:
+                    image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+                if out.tell() <= maxSize or max(image.size) <= 1:
+                    return out.getvalue(), "image/png" if alpha else "image/jpeg", *image.size
+            size = (max(1, int(image.width * 0.75)), max(1, int(image.height * 0.75)))
+            image = image.resize(size, Image.Resampling.LANCZOS)
+
+
+class ImageProcessor:
+    """Prepares images for uploadImage/uploadImages on a pool of `maxWorkers` processes (see prepareImage),
+    so that decoding and encoding camera-sized photos does not hold up the threads that post.
+
+    agent = BskyAgent(imageProcessor=ImageProcessor())
+    embed = agent.uploadImages(["photo1.jpg", "photo2.jpg"])  # each under 1 MB, with aspectRatio
+
+    If maxWorkers is 0, images are prepared in the calling thread. Requires Pillow (pip install nanoatp[image]).
+    """
+
+    def __init__(
+        self, maxSize: int = MAX_IMAGE_SIZE, maxDimension: int = MAX_IMAGE_DIMENSION, maxWorkers: int | None = None
+    ):
+        import PIL  # noqa: F401 fail early if Pillow is not installed
+
+        self.maxSize = maxSize
+        self.maxDimension = maxDimension
+        self.maxWorkers = maxWorkers
+        self.executor: ProcessPoolExecutor | None = None  # started on first use
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
+
+    def submit(self, path: str) -> Future[tuple[bytes, str, int, int]]:
+        if self.maxWorkers == 0:
+            future: Future[tuple[bytes, str, int, int]] = Future()
+            try:
+                future.set_result(prepareImage(path, self.maxSize, self.maxDimension))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.maxWorkers)
+        return self.executor.submit(prepareImage, path, self.maxSize, self.maxDimension)
+
+    def __call__(self, path: str):
+        """returns (data, encoding, width, height)"""
+        return self.submit(path).result()
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+                self.executor = None
@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import requests
+
+    from .bskyagent import BskyAgent
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds, the Prometheus defaults
+
+
+class Metrics:
+    """Collects per-NSID request metrics from BskyAgent response hooks.
+
+    metrics = Metrics()
+    agent = BskyAgent(metrics=metrics)  # or agent.hooks["response"].append(metrics.observe)
+    ...
+    metrics.asDict()      # {nsid: {"count", "sum", "buckets", "statuses", ...}, ...}
+    metrics.prometheus()  # text exposition format
+
+    Every attempt is recorded, so retries show up as extra requests. Connection errors are counted
+    under status "error". Response sizes are taken from Content-Length. Rate-limit headroom is the
+    last ratelimit-remaining/limit seen per account.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.endpoints: dict[str, dict[str, Any]] = {}
+        self.rateLimits: dict[str, dict[str, float]] = {}  # account -> {limit, remaining, reset}
+        self.lock = threading.Lock()
+
+    def observe(self, agent: BskyAgent, nsid: str, response: requests.Response | None, elapsed: float, attempt: int):
+        """a response hook: record one attempt of an XRPC request."""
+        status = str(response.status_code) if response is not None else "error"
+        sent = received = 0
+        if response is not None:
+            sent = int(response.request.headers.get("Content-Length") or 0)
+            received = int(response.headers.get("Content-Length") or 0)
+        with self.lock:
+            endpoint = self.endpoints.get(nsid)
+            if endpoint is None:
+                endpoint = self.endpoints[nsid] = {
+                    "count": 0,
+                    "sum": 0.0,
+                    "buckets": [0] * (len(self.buckets) + 1),  # the last one is +Inf
+                    "statuses": {},
+                    "bytesSent": 0,
+                    "bytesReceived": 0,
+                    "retries": 0,
+                }
+            endpoint["count"] += 1
+            endpoint["sum"] += elapsed
+            endpoint["buckets"][bisect_left(self.buckets, elapsed)] += 1
+            endpoint["statuses"][status] = endpoint["statuses"].get(status, 0) + 1
+            endpoint["bytesSent"] += sent
+            endpoint["bytesReceived"] += received
+            endpoint["retries"] += 1 if attempt else 0
+            headers = response.headers if response is not None else {}
+            if headers.get("ratelimit-limit") and headers.get("ratelimit-remaining"):
+                self.rateLimits[agent.session.get("did") or ""] = {
+                    "limit": float(headers["ratelimit-limit"]),
+                    "remaining": float(headers["ratelimit-remaining"]),
+                    "reset": float(headers.get("ratelimit-reset") or 0),
+                }
+
+    def asDict(self):
+        with self.lock:
+            endpoints = {
+                nsid: {**endpoint, "buckets": list(endpoint["buckets"]), "statuses": dict(endpoint["statuses"])}
+                for nsid, endpoint in self.endpoints.items()
+            }
+            return {"endpoints": endpoints, "rateLimits": {key: dict(value) for key, value in self.rateLimits.items()}}
+
+    def prometheus(self, prefix: str = "nanoatp"):
+        """https://prometheus.io/docs/instrumenting/exposition_formats/"""
+        data = self.asDict()
+        lines = [
+            f"# HELP {prefix}_request_duration_seconds XRPC request latency.",
+            f"# TYPE {prefix}_request_duration_seconds histogram",
+        ]
+        for nsid, endpoint in data["endpoints"].items():
+            cumulative = 0
+            for le, count in zip([*map(str, self.buckets), "+Inf"], endpoint["buckets"]):
+                cumulative += count
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{nsid="{nsid}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_request_duration_seconds_sum{{nsid="{nsid}"}} {endpoint["sum"]}')
+            lines.append(f'{prefix}_request_duration_seconds_count{{nsid="{nsid}"}} {endpoint["count"]}')
+        counters = [
+            ("requests_total", "XRPC requests by status.", None),
+            ("request_bytes_total", "Bytes sent in request bodies.", "bytesSent"),
+            ("response_bytes_total", "Bytes received in response bodies.", "bytesReceived"),
+            ("retries_total", "Retried XRPC requests.", "retries"),
+        ]
+        for name, help, key in counters:
+            lines += [f"# HELP {prefix}_{name} {help}", f"# TYPE {prefix}_{name} counter"]
+            for nsid, endpoint in data["endpoints"].items():
+                if key is None:
+                    for status, count in endpoint["statuses"].items():
+                        lines.append(f'{prefix}_{name}{{nsid="{nsid}",status="{status}"}} {count}')
+                else:
+                    lines.append(f'{prefix}_{name}{{nsid="{nsid}"}} {endpoint[key]}')
+        for name in ["remaining", "limit"]:
+            lines += [
+                f"# HELP {prefix}_ratelimit_{name} Last ratelimit-{name} header.",
+                f"# TYPE {prefix}_ratelimit_{name} gauge",
+            ]
+            for account, limits in data["rateLimits"].items():
+                lines.append(f'{prefix}_ratelimit_{name}{{account="{account}"}} {limits[name]:g}')
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self.lock:
+            self.endpoints.clear()
+            self.rateLimits.clear()
@@ -0,0 +1,190 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+from typing import Any, Callable, ClassVar
+
+MODELS: dict[str, type[Model]] = {}  # $type -> model class
+
+
+class Model:
+    """Base of the slotted lexicon models.
+
+    A model holds its fields in __slots__ instead of a per-instance dict. fromDict() keeps references to the
+    decoded JSON values (strings are not copied) and toDict() gives the wire dict back. Keys a model does not
+    know are kept in `extra`, so the conversion is lossless.
+    """
+
+    __slots__ = ("extra",)
+    TYPE: ClassVar[str] = ""  # $type on the wire, if the lexicon object carries one
+    FIELDS: ClassVar[tuple[str, ...]] = ()
+    NESTED: ClassVar[dict[str, Callable[[Any], Any]]] = {}  # field -> converter from the wire value
+    _known: ClassVar[frozenset[str]] = frozenset()
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        cls._known = frozenset(cls.FIELDS) | ({"$type"} if cls.TYPE else set())
+        if cls.TYPE:
+            MODELS[cls.TYPE] = cls
+
+    def __init__(self, *args: Any, extra: dict[str, Any] | None = None, **kwargs: Any):
+        kwargs.update(zip(self.FIELDS, args))
+        for name in self.FIELDS:
+            setattr(self, name, kwargs.pop(name, None))
+        if kwargs:
+            raise TypeError(f"{type(self).__name__} has no fields {sorted(kwargs)}")
+        self.extra = extra
+
+    @classmethod
+    def fromDict(cls, data: dict[str, Any]):
+        obj = cls.__new__(cls)
+        nested = cls.NESTED
+        for name in cls.FIELDS:
+            value = data.get(name)
+            setattr(obj, name, nested[name](value) if value is not None and name in nested else value)
+        known = cls._known
+        obj.extra = {key: value for key, value in data.items() if key not in known} or None
+        return obj
+
+    def toDict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"$type": self.TYPE} if self.TYPE else {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                out[name] = toDict(value)
+        out.update(self.extra) if self.extra else None
+        return out
+
+    def __eq__(self, other: object):
+        return type(self) is type(other) and self.toDict() == other.toDict()  # type: ignore
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self.FIELDS if getattr(self, name) is not None
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+def fromDict(value: Any) -> Any:
+    """convert a wire dict to its model by $type. other values are returned as they are."""
+    if isinstance(value, dict):
+        model = MODELS.get(value.get("$type"))  # type: ignore
+        return model.fromDict(value) if model else value
+    return value
+
+
+def toDict(value: Any) -> Any:
+    """convert models (also inside lists and dicts) back to wire dicts."""
+    if isinstance(value, Model):
+        return value.toDict()
+    if isinstance(value, list):
+        return [toDict(item) for item in value]
+    if isinstance(value, dict):
+        return {key: toDict(item) for key, item in value.items()}
+    return value
+
+
+def _list(convert: Callable[[Any], Any]):
+    return lambda items: [convert(item) for item in items]
+
+
+class StrongRef(Model):
+    """com.atproto.repo.strongRef"""
+
+    FIELDS = __slots__ = ("uri", "cid")
+
+
+class BlobRef(Model):
+    """https://atproto.com/specs/data-model#blob-type `ref` holds the CID string."""
+
+    TYPE = "blob"
+    FIELDS = __slots__ = ("ref", "mimeType", "size")
+    NESTED = {"ref": lambda ref: ref["$link"]}
+
+    def toDict(self):
+        return {**super().toDict(), "ref": {"$link": self.ref}}
+
+
+class ByteSlice(Model):
+    """app.bsky.richtext.facet#byteSlice"""
+
+    FIELDS = __slots__ = ("byteStart", "byteEnd")
+
+
+class Mention(Model):
+    TYPE = "app.bsky.richtext.facet#mention"
+    FIELDS = __slots__ = ("did",)
+
+
+class Link(Model):
+    TYPE = "app.bsky.richtext.facet#link"
+    FIELDS = __slots__ = ("uri",)
+
+
+class Tag(Model):
+    TYPE = "app.bsky.richtext.facet#tag"
+    FIELDS = __slots__ = ("tag",)
+
+
+class Facet(Model):
+    TYPE = "app.bsky.richtext.facet"
+    FIELDS = __slots__ = ("index", "features")
+    NESTED = {"index": ByteSlice.fromDict, "features": _list(fromDict)}
+
+
+class ReplyRef(Model):
+    """app.bsky.feed.post#replyRef"""
+
+    FIELDS = __slots__ = ("root", "parent")
+    NESTED = {"root": StrongRef.fromDict, "parent": StrongRef.fromDict}
+
+
+class Post(Model):
+    """app.bsky.feed.post. embed is kept as the wire dict."""
+
+    TYPE = "app.bsky.feed.post"
+    FIELDS = __slots__ = ("text", "createdAt", "facets", "reply", "embed", "langs", "labels", "tags")
+    NESTED = {"facets": _list(Facet.fromDict), "reply": ReplyRef.fromDict}
+
+
+class Like(Model):
+    TYPE = "app.bsky.feed.like"
+    FIELDS = __slots__ = ("subject", "createdAt")
+    NESTED = {"subject": StrongRef.fromDict}
+
+
+class Repost(Model):
+    TYPE = "app.bsky.feed.repost"
+    FIELDS = __slots__ = ("subject", "createdAt")
+    NESTED = {"subject": StrongRef.fromDict}
+
+
+class Follow(Model):
+    TYPE = "app.bsky.graph.follow"
+    FIELDS = __slots__ = ("subject", "createdAt")
+
+
+class Block(Model):
+    TYPE = "app.bsky.graph.block"
+    FIELDS = __slots__ = ("subject", "createdAt")
+
+
+class Record(Model):
+    """an item of com.atproto.repo.listRecords. value stays the wire dict until it is first accessed."""
+
+    FIELDS = ("uri", "cid", "value")
+    __slots__ = ("uri", "cid", "_value")
+
+    @property
+    def value(self) -> Any:
+        if isinstance(self._value, dict):
+            self._value = fromDict(self._value)
+        return self._value
+
+    @value.setter
+    def value(self, value: Any):
+        self._value = value
+
+    def toDict(self):
+        return {"uri": self.uri, "cid": self.cid, "value": toDict(self._value), **(self.extra or {})}
@@ -0,0 +1,269 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from .batch import APPLY_WRITES_LIMIT
+from .bskyagent import postRecord
+from .tid import nextTid
+from .uri import parseAtUri
+
+if TYPE_CHECKING:
+    from .bskyagent import BskyAgent
+
+BATCHED = ("post", "deletePost")  # ops sent together with applyWrites
+
+
+class Outbox:
+    """A durable queue of post, deletePost and uploadBlob jobs that survives crashes.
+
+    Jobs and listRecords checkpoints are kept in a SQLite database at `path` (in memory if path is "").
+    `run()` drains the queue on worker threads at the pace of the agent's RateLimiter. Posts and deletes
+    are sent up to `batchSize` at a time with applyWrites. Jobs left running by a crash are picked up
+    again when the outbox is reopened.
+
+    Jobs are idempotent. A job with a `key` that is already queued is not added again, and deletes
+    are keyed by URI. A post gets its rkey (a TID) when it is queued. If a retried post is already in
+    the repo, it is marked done and not created again. A retried batch is sent one job at a time,
+    so one bad job does not hold back the others. A failed job is retried after a backoff given by the
+    agent's RateLimiter, and fails for good after `maxAttempts`.
+
+    with Outbox(agent, "outbox.db") as outbox:
+        outbox.enqueueDeletes("app.bsky.feed.post")  # resumes listing from the last checkpoint
+        outbox.post({"text": "Hello"}, key="hello")
+        print(outbox.run(workers=2))
+    """
+
+    def __init__(self, agent: BskyAgent, path: str = "", batchSize: int = APPLY_WRITES_LIMIT, maxAttempts: int = 3):
+        self.agent = agent
+        self.path = path
+        self.batchSize = batchSize
+        self.maxAttempts = maxAttempts
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL") if path else None
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, key TEXT UNIQUE, op TEXT NOT NULL, "
+            "args TEXT NOT NULL, state TEXT NOT NULL, attempts INTEGER NOT NULL, result TEXT, error TEXT, "
+            "updated REAL, notBefore REAL NOT NULL DEFAULT 0)"
+        )
+        if "notBefore" not in [row[1] for row in self.db.execute("PRAGMA table_info(jobs)")]:  # an older outbox
+            self.db.execute("ALTER TABLE jobs ADD COLUMN notBefore REAL NOT NULL DEFAULT 0")
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, op, id)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS checkpoints (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.db.execute("UPDATE jobs SET state = 'pending' WHERE state = 'running'")  # left by a crash
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
+
+    def enqueue(self, op: str, args: dict[str, Any], key: str = ""):
+        """add a job, returns its id. if a job with the same key exists, returns the id of that job instead."""
+        with self.lock:
+            jobId = self._insert(op, args, key)
+            self.db.commit()
+        return jobId
+
+    def _insert(self, op: str, args: dict[str, Any], key: str):
+        row = self.db.execute("SELECT id FROM jobs WHERE key = ?", (key,)).fetchone() if key else None
+        if row:
+            return row[0]
+        cursor = self.db.execute(
+            "INSERT INTO jobs (key, op, args, state, attempts, updated) VALUES (?, ?, ?, 'pending', 0, ?)",
+            (key or None, op, json.dumps(args), time.time()),
+        )
+        return cursor.lastrowid
+
+    def post(self, record: dict[str, Any], key: str = ""):
+        return self.enqueue("post", {"rkey": nextTid(), "record": postRecord(dict(record))}, key)
+
+    def deletePost(self, postUri: str, key: str = ""):
+        return self.enqueue("deletePost", {"uri": postUri}, key or f"deletePost {postUri}")
+
+    def uploadBlob(self, path: str, encoding: str, key: str = ""):
+        """the file at path is read when the job runs."""
+        return self.enqueue("uploadBlob", {"path": path, "encoding": encoding}, key)
+
+    def checkpoint(self, name: str) -> dict[str, Any] | None:
+        with self.lock:
+            row = self.db.execute("SELECT value FROM checkpoints WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def enqueueDeletes(self, collection: str = "app.bsky.feed.post", repo: str = "", limit: int = 100):
+        """queue a delete for every record of a collection, oldest first.
+        listRecords is paged from the last checkpoint. each page's deletes and its cursor are saved in one
+        transaction, so an interrupted listing resumes where it stopped. once a listing is done and its
+        deletes have run, the checkpoint is cleared and the next call lists the collection again.
+        returns the number of jobs added.
+        """
+        repo = repo or self.agent._repo()
+        name = f"listRecords {repo} {collection}"
+        with self.lock:
+            row = self.db.execute("SELECT value FROM checkpoints WHERE name = ?", (name,)).fetchone()
+            checkpoint = json.loads(row[0]) if row else {"cursor": "", "done": False}
+            running = "SELECT 1 FROM jobs WHERE op = 'deletePost' AND state IN ('pending', 'running') LIMIT 1"
+            if checkpoint["done"] and self.db.execute(running).fetchone() is None:
+                self.db.execute("DELETE FROM checkpoints WHERE name = ?", (name,))
+                self.db.commit()
+                checkpoint = {"cursor": "", "done": False}
+        added = 0
+        while not checkpoint["done"]:
+            response = self.agent._repo_listRecords(
+                repo, collection, limit=limit, cursor=checkpoint["cursor"], reverse=True
+            )
+            if "records" not in response:
+                raise Exception(str(response))
+            checkpoint = {"cursor": response.get("cursor") or "", "done": not response.get("cursor")}
+            with self.lock:
+                changes = self.db.total_changes
+                for record in response["records"]:
+                    self._insert("deletePost", {"uri": record["uri"]}, f"deletePost {record['uri']}")
+                added += self.db.total_changes - changes
+                self.db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?)", (name, json.dumps(checkpoint)))
+                self.db.commit()
+        return added
+
+    def run(self, workers: int = 1):
+        """drain the queue on `workers` threads, returns stats() when no job is left to run."""
+        threads = [threading.Thread(target=self._work, name=f"nanoatp-outbox-{i}") for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.stats()
+
+    def _work(self):
+        while True:
+            jobs = self._claim()
+            if jobs:
+                self._execute(jobs)
+                continue
+            with self.lock:  # the jobs left are waiting to be retried, or none
+                due = self.db.execute("SELECT MIN(notBefore) FROM jobs WHERE state = 'pending'").fetchone()[0]
+            if due is None:
+                return
+            time.sleep(max(0.0, due - time.time()))
+
+    def _claim(self) -> list[tuple[int, str, dict[str, Any], int]]:
+        """mark the oldest due job (and due jobs of the same op, if it can be batched) as running."""
+        with self.lock:
+            now = time.time()
+            row = self.db.execute(
+                "SELECT op FROM jobs WHERE state = 'pending' AND notBefore <= ? ORDER BY id LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                return []
+            limit = self.batchSize if row[0] in BATCHED else 1
+            rows = self.db.execute(
+                "SELECT id, op, args, attempts FROM jobs WHERE state = 'pending' AND notBefore <= ? AND op = ? "
+                "ORDER BY id LIMIT ?",
+                (now, row[0], limit),
+            ).fetchall()
+            self.db.executemany(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, updated = ? WHERE id = ?",
+                [(time.time(), jobId) for jobId, *_ in rows],
+            )
+            self.db.commit()
+        return [(jobId, op, json.loads(args), attempts + 1) for jobId, op, args, attempts in rows]
+
+    def _execute(self, jobs: list[tuple[int, str, dict[str, Any], int]]):
+        results: list[dict[str, Any] | Exception]
+        if len(jobs) > 1 and all(attempts == 1 for *_, attempts in jobs):
+            try:
+                results = self._applyWrites(jobs)
+            except Exception as e:  # retried one job at a time, to find the bad one
+                results = [e] * len(jobs)
+        else:
+            results = []
+            for _, op, args, attempts in jobs:
+                try:
+                    results.append(self._run(op, args, attempts))
+                except Exception as e:
+                    results.append(e)
+        now = time.time()
+        with self.lock:
+            for (jobId, _, _, attempts), result in zip(jobs, results):
+                if isinstance(result, Exception):
+                    state = "failed" if attempts >= self.maxAttempts else "pending"
+                    notBefore = now + self.agent.rateLimiter.retryDelay(attempts - 1)
+                    self.db.execute(
+                        "UPDATE jobs SET state = ?, error = ?, updated = ?, notBefore = ? WHERE id = ?",
+                        (state, str(result), now, notBefore, jobId),
+                    )
+                else:
+                    self.db.execute(
+                        "UPDATE jobs SET state = 'done', result = ?, error = NULL, updated = ? WHERE id = ?",
+                        (json.dumps(result), now, jobId),
+                    )
+            self.db.commit()
+
+    def _applyWrites(self, jobs: list[tuple[int, str, dict[str, Any], int]]) -> list[dict[str, Any] | Exception]:
+        writes = [self._write(op, args) for _, op, args, _ in jobs]
+        results = self.agent.applyWrites(writes)["results"]
+        if len(results) != len(jobs):  # e.g. an older PDS without results, checked one job at a time on retry
+            raise Exception(f"applyWrites returned {len(results)} results for {len(jobs)} writes")
+        return [{"uri": result["uri"], "cid": result["cid"]} if result.get("uri") else {} for result in results]
+
+    def _write(self, op: str, args: dict[str, Any]):
+        if op == "post":
+            collection, rkey = "app.bsky.feed.post", args["rkey"]
+            return {
+                "$type": "com.atproto.repo.applyWrites#create",
+                "collection": collection,
+                "rkey": rkey,
+                "value": args["record"],
+            }
+        _, collection, rkey = parseAtUri(args["uri"])
+        return {"$type": "com.atproto.repo.applyWrites#delete", "collection": collection, "rkey": rkey}
+
+    def _run(self, op: str, args: dict[str, Any], attempts: int) -> dict[str, Any]:
+        agent = self.agent
+        if op == "post":
+            if attempts > 1:  # the previous attempt may have been processed
+                existing = agent._repo_getRecord(agent._repo(), "app.bsky.feed.post", args["rkey"])
+                if existing.get("cid"):
+                    return {"uri": existing["uri"], "cid": existing["cid"]}
+            response = agent._repo_createRecord(agent._repo(), "app.bsky.feed.post", args["record"], rkey=args["rkey"])
+        elif op == "deletePost":
+            repo, collection, rkey = parseAtUri(args["uri"])
+            response = agent.call(
+                "com.atproto.repo.deleteRecord", body={"repo": repo, "collection": collection, "rkey": rkey}
+            )
+        elif op == "uploadBlob":
+            with open(args["path"], "rb") as f:
+                response = agent.uploadBlob(f, args["encoding"])
+        else:
+            raise Exception(f"Unknown op: {op}")
+        if response.get("error"):
+            raise Exception(str(response))
+        return response
+
+    def result(self, jobId: int) -> dict[str, Any] | None:
+        """{"op", "state", "attempts", "result", "error"} of a job."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT op, state, attempts, result, error FROM jobs WHERE id = ?", (jobId,)
+            ).fetchone()
+        if row is None:
+            return None
+        op, state, attempts, result, error = row
+        return {"op": op, "state": state, "attempts": attempts, "result": json.loads(result or "null"), "error": error}
+
+    def stats(self):
+        """number of jobs by state."""
+        with self.lock:
+            rows = self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return {"pending": 0, "running": 0, "done": 0, "failed": 0, **dict(rows)}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
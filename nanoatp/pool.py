@@ -0,0 +1,207 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .bskyagent import (
+    HANDLE_CACHE_SIZE,
+    HANDLE_CACHE_TTL,
+    LINK_CARD_CACHE_SIZE,
+    LINK_CARD_CACHE_TTL,
+    RECORD_CACHE_SIZE,
+    BskyAgent,
+)
+from .cache import TTLCache
+from .codec import Codec, getCodec
+from .metrics import Metrics
+from .ratelimit import RateLimiter
+from .sessionstore import SessionStore
+
+T = TypeVar("T")
+
+
+class AgentPool:
+    """Many logged-in accounts on one PDS over a single transport.
+
+    All agents share one `requests.Session` whose connection pool holds at most `maxConnections`
+    keep-alive connections, as well as the handle, link card and record caches. Each account keeps its own
+    session and RateLimiter, so one account running out of budget does not slow the others.
+    Work is scheduled per account: at most `perAccount` tasks of an account run at a time, on
+    `maxWorkers` threads shared by all accounts. The tasks of an account whose RateLimiter is
+    throttling it are held back until it has budget again, so they do not sleep on a shared thread.
+
+    with AgentPool("https://bsky.social") as pool:
+        pool.addAll([("bot1.bsky.social", "password1"), ("bot2.bsky.social", "password2")])
+        pool.map(lambda agent: agent.post({"text": "Hello"}))
+        print(pool.stats())
+    """
+
+    def __init__(
+        self,
+        service: str = "https://bsky.social",
+        maxConnections: int = 10,
+        maxWorkers: int = 10,
+        perAccount: int = 1,
+        sessionStore: SessionStore | None = None,
+        codec: Codec | None = None,
+        metrics: Metrics | None = None,
+    ):
+        self.service = service
+        self.maxConnections = maxConnections
+        self.perAccount = perAccount
+        self.sessionStore = sessionStore
+        self.codec = codec or getCodec()
+        self.metrics = metrics  # shared by all agents, rate limits are reported per account
+        self.requests = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxConnections)
+        self.requests.mount("https://", adapter)
+        self.requests.mount("http://", adapter)
+        self.requests.hooks["response"].append(self._count)
+        self.handleCache = TTLCache(maxsize=HANDLE_CACHE_SIZE, ttl=HANDLE_CACHE_TTL)
+        self.linkMetaCache = TTLCache(maxsize=LINK_CARD_CACHE_SIZE, ttl=LINK_CARD_CACHE_TTL)
+        self.recordCache = TTLCache(maxsize=RECORD_CACHE_SIZE)
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="nanoatp-pool")
+        self.agents: dict[str, BskyAgent] = {}
+        self.queues: dict[str, deque[tuple[Callable[[BskyAgent], Any], Future[Any]]]] = {}
+        self.running: dict[str, int] = {}
+        self.timers: dict[str, threading.Timer] = {}  # accounts waiting for their rate limit to reset
+        self.statuses: dict[int, int] = {}  # HTTP status -> responses, including retried ones
+        self.tasks = {"submitted": 0, "completed": 0, "failed": 0}
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
+
+    def __len__(self):
+        return len(self.agents)
+
+    def __contains__(self, identifier: str):
+        return identifier in self.agents
+
+    def __getitem__(self, identifier: str):
+        return self.agents[identifier]
+
+    def add(self, identifier: str, password: str = "", rateLimiter: RateLimiter | None = None):
+        """log in an account (or resume its session from sessionStore) and return its agent."""
+        rateLimiter = rateLimiter or RateLimiter()
+        agent = BskyAgent(
+            self.service,
+            self.sessionStore,
+            rateLimiter,
+            linkMetaCache=self.linkMetaCache,
+            codec=self.codec,
+            metrics=self.metrics,
+        )
+        agent.requests.close()
+        agent.requests = self.requests
+        agent.handleCache = self.handleCache
+        agent.recordCache = self.recordCache
+        agent.login(identifier, password)
+        with self.lock:
+            self.agents[identifier] = agent
+            self.queues.setdefault(identifier, deque())
+            self.running.setdefault(identifier, 0)
+        return agent
+
+    def addAll(self, accounts: Iterable[tuple[str, str]]):
+        """log in (identifier, password) pairs concurrently, returns their agents."""
+        futures = [self.executor.submit(self.add, identifier, password) for identifier, password in accounts]
+        return [future.result() for future in futures]
+
+    def submit(self, identifier: str, fn: Callable[[BskyAgent], T]) -> Future[T]:
+        """schedule fn(agent) for an account, returns a Future of its result."""
+        future: Future[T] = Future()
+        with self.lock:
+            self.queues[identifier].append((fn, future))
+            self.tasks["submitted"] += 1
+        self._schedule(identifier)
+        return future
+
+    def map(self, fn: Callable[[BskyAgent], T], identifiers: Iterable[str] | None = None) -> dict[str, T]:
+        """run fn(agent) for each account (all by default), returns {identifier: result} or raises the first error."""
+        identifiers = list(self.agents) if identifiers is None else identifiers
+        futures = {identifier: self.submit(identifier, fn) for identifier in identifiers}
+        return {identifier: future.result() for identifier, future in futures.items()}
+
+    def _schedule(self, identifier: str):
+        agent = self.agents[identifier]
+        with self.lock:
+            queue = self.queues[identifier]
+            if not queue or self.running[identifier] >= self.perAccount or identifier in self.timers:
+                return
+            delay = agent.rateLimiter.throttled()
+            if delay > 0:  # try again when the account has budget, instead of blocking a worker
+                timer = self.timers[identifier] = threading.Timer(delay, self._resume, [identifier])
+                timer.daemon = True
+                timer.start()
+                return
+            fn, future = queue.popleft()
+            self.running[identifier] += 1
+
+        def run():
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(agent))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self.lock:
+                    self.running[identifier] -= 1
+                    self.tasks["failed" if future.cancelled() or future.exception() else "completed"] += 1
+                self._schedule(identifier)
+
+        self.executor.submit(run)
+
+    def _resume(self, identifier: str):
+        with self.lock:
+            self.timers.pop(identifier, None)
+        self._schedule(identifier)
+
+    def _count(self, response: requests.Response, *args: Any, **kwargs: Any):
+        with self.lock:
+            self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+
+    def stats(self):
+        """aggregate counters of the pool and the rate-limit budget each account has left."""
+        with self.lock:
+            return {
+                "accounts": len(self.agents),
+                "maxConnections": self.maxConnections,
+                "requests": sum(self.statuses.values()),
+                "statuses": dict(self.statuses),
+                **self.tasks,
+                "running": sum(self.running.values()),
+                "queued": sum(len(queue) for queue in self.queues.values()),
+                "throttled": len(self.timers),
+                "rateLimits": {
+                    identifier: {
+                        "limit": agent.rateLimiter.limit,
+                        "remaining": agent.rateLimiter.remaining,
+                        "reset": agent.rateLimiter.reset,
+                    }
+                    for identifier, agent in self.agents.items()
+                },
+            }
+
+    def close(self):
+        with self.lock:  # the tasks held back for a rate limit are cancelled
+            for identifier, timer in self.timers.items():
+                timer.cancel()
+                for _, future in self.queues[identifier]:
+                    future.cancel()
+                self.queues[identifier].clear()
+            self.timers.clear()
+        self.executor.shutdown(wait=True)
+        self.requests.close()
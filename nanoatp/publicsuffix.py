@@ -0,0 +1,70 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import os
+import threading
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Any
+
+END = "$"  # marks a node where a rule ends
+
+_trie: dict[str, Any] | None = None
+_lock = threading.Lock()
+
+
+def suffixListPath():
+    """the Public Suffix List bundled with the tld package, located without importing it."""
+    spec = find_spec("tld")
+    if spec is None or not spec.submodule_search_locations:
+        raise Exception("tld package is not installed")
+    return os.path.join(list(spec.submodule_search_locations)[0], "res", "effective_tld_names.dat.txt")
+
+
+def buildTrie(lines: list[str]):
+    """https://github.com/publicsuffix/list/wiki/Format
+    a trie of reversed labels, "*" for wildcards and "!label" for exceptions.
+    """
+    trie: dict[str, Any] = {}
+    for line in lines:
+        rule = line.strip().split(" ")[0].lower()
+        if not rule or rule.startswith("//"):
+            continue
+        labels = rule.split(".")
+        node = trie
+        for label in reversed(labels[1:]):
+            node = node.setdefault(label, {})
+        node.setdefault(labels[0], {})[END] = True
+    return trie
+
+
+def loadTrie():
+    global _trie
+    if _trie is None:
+        with _lock:
+            if _trie is None:
+                with open(suffixListPath(), encoding="utf-8") as f:
+                    _trie = buildTrie(f.read().splitlines())
+    return _trie
+
+
+@lru_cache(maxsize=4096)
+def publicSuffix(domain: str) -> str | None:
+    """the longest public suffix of domain that an explicit rule matches (no implicit "*" rule), or None."""
+    labels = domain.lower().rstrip(".").split(".")
+    node = loadTrie()
+    matched = -1  # number of labels of the matched suffix
+    for i, label in enumerate(reversed(labels)):
+        if f"!{label}" in node:  # exception: the suffix is the labels matched so far
+            matched = i
+            break
+        if END in node.get("*", {}):
+            matched = i + 1
+        if label not in node:
+            break
+        node = node[label]
+        if END in node:
+            matched = i + 1
+    return ".".join(labels[len(labels) - matched :]) if matched > 0 else None
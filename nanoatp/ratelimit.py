@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Mapping
+
+RETRY_STATUS_CODES = (429, 502, 503, 504)  # retried for queries (GET), which are safe to send again
+# a procedure is retried only if it was rejected before it was processed (rate limited, unavailable).
+# a 502 or 504 comes from a gateway and does not show that the PDS did not process the write.
+PROCEDURE_RETRY_STATUS_CODES = (429, 503)
+
+
+class RateLimiter:
+    """Paces requests with the rate-limit budget the server reports in ratelimit-* response headers.
+
+    Requests go out freely while more than `paceBelow` of the budget remains. Below that they are spaced
+    evenly over the rest of the window, and when the budget is used up they wait for the window to reset.
+    Failed requests are retried up to `maxRetries` times with jittered exponential backoff.
+    https://docs.bsky.app/docs/advanced-guides/rate-limits
+    """
+
+    def __init__(self, maxRetries: int = 5, backoff: float = 0.5, maxBackoff: float = 60.0, paceBelow: float = 0.5):
+        self.maxRetries = maxRetries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.paceBelow = paceBelow
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset = 0.0  # epoch seconds
+        self.nextAt = 0.0  # epoch seconds, earliest time the next request may be sent
+        self.lock = threading.Lock()
+
+    def delay(self):
+        """reserve a slot for one request and return how many seconds to wait before sending it."""
+        with self.lock:
+            now = time.time()
+            if self.remaining is None or self.limit is None or now >= self.reset:
+                return 0.0  # unknown budget or a new window
+            if self.remaining <= 0:
+                slot = max(self.nextAt, self.reset)
+                self.nextAt = slot
+            elif self.remaining < self.limit * self.paceBelow:
+                slot = max(self.nextAt, now)
+                self.nextAt = slot + max(0.0, self.reset - slot) / self.remaining
+            else:
+                slot = now
+            self.remaining = max(0, self.remaining - 1)  # until a response reports the actual value
+            return max(0.0, slot - now)
+
+    def throttled(self):
+        """seconds until the next request could be sent, without reserving a slot. 0 if it can go now."""
+        with self.lock:
+            now = time.time()
+            if self.remaining is None or self.limit is None or now >= self.reset:
+                return 0.0
+            if self.remaining <= 0:
+                return max(self.nextAt, self.reset) - now
+            if self.remaining < self.limit * self.paceBelow:
+                return max(0.0, self.nextAt - now)
+            return 0.0
+
+    def wait(self):
+        delay = self.delay()
+        time.sleep(delay) if delay > 0 else None
+        return delay
+
+    def update(self, status: int, headers: Mapping[str, str]):
+        """record the budget from response headers. a 429 without headers blocks until Retry-After."""
+        limit = headers.get("ratelimit-limit")
+        remaining = headers.get("ratelimit-remaining")
+        reset = headers.get("ratelimit-reset")
+        retryAfter = headers.get("retry-after")
+        with self.lock:
+            if limit and remaining and reset:
+                self.limit = int(limit)
+                self.remaining = int(remaining)
+                self.reset = float(reset)
+            if status == 429:
+                self.remaining = 0
+                self.limit = self.limit or 1
+                if retryAfter and retryAfter.isdigit():
+                    self.reset = max(self.reset, time.time() + int(retryAfter))
+                elif self.reset <= time.time():
+                    self.reset = time.time() + self.backoff
+
+    def retryDelay(self, attempt: int):
+        """jittered exponential backoff for the given retry attempt (0-based)."""
+        return random.uniform(0, min(self.maxBackoff, self.backoff * 2**attempt))
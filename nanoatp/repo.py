@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import mmap
+from typing import Any, BinaryIO, Iterator
+
+from . import cbor
+from .car import readCarHeader
+from .cid import CID, readVarint
+
+
+class RepoReader:
+    """https://atproto.com/specs/repository a repository CAR file (e.g. from BskyAgent.exportRepo), memory-mapped.
+
+    Only the offsets of the blocks are held in memory. Records are decoded as they are iterated.
+
+    with RepoReader("repo.car") as repo:
+        for record in repo.records("app.bsky.feed.post"):
+            print(record["uri"], record["value"]["text"])
+
+    file can be a path or an open binary file, which the reader then owns and closes.
+    """
+
+    def __init__(self, file: str | BinaryIO):
+        self.file = open(file, "rb") if isinstance(file, str) else file
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.file.close()
+            raise
+        roots, pos = readCarHeader(self.data)
+        self.index: dict[bytes, tuple[int, int]] = {}  # binary CID -> (start, end) of the block
+        end = len(self.data)
+        while pos < end:
+            length, pos = readVarint(self.data, pos)
+            cid, start = CID.parse(self.data, pos)
+            pos += length
+            self.index[cid.bytes] = (start, pos)
+        commit = self.block(roots[0])
+        self.did: str = commit["did"]
+        self.rev: str = commit.get("rev") or ""
+        self.root: CID = commit["data"]  # root of the Merkle Search Tree
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args: object):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def block(self, cid: CID) -> Any:
+        """the decoded DAG-CBOR block of cid."""
+        start, end = self.index[cid.bytes]
+        return cbor.loads(self.data, start)[0] if end > start else None
+
+    def walk(self, collection: str = "") -> Iterator[tuple[str, CID]]:
+        """yield (collection/rkey, record CID) in key order. subtrees outside collection are not visited."""
+        low, high = (f"{collection}/", f"{collection}0") if collection else ("", None)  # "0" follows "/"
+        stack: list[tuple[CID | None, str | None]] = [(self.root, None)]  # (node or record CID, key of a record)
+        while stack:
+            cid, key = stack.pop()
+            if key is not None:
+                if key >= low and (high is None or key < high):
+                    yield key, cid  # type: ignore
+                continue
+            if cid is None or cid.bytes not in self.index:
+                continue
+            node = self.block(cid)
+            items: list[tuple[CID | None, str | None]] = [(node.get("l"), None)]
+            prefix = b""
+            for entry in node["e"]:
+                prefix = prefix[: entry["p"]] + entry["k"]
+                items += [(entry["v"], prefix.decode()), (entry.get("t"), None)]
+            # a subtree holds the keys between its neighbour entries, so it can be skipped by those bounds
+            for i in range(len(items) - 1, -1, -1):
+                cid, key = items[i]
+                if key is None and cid is not None:
+                    before = items[i - 1][1] if i > 0 else None
+                    after = items[i + 1][1] if i + 1 < len(items) else None
+                    if (before is not None and high is not None and before >= high) or (
+                        after is not None and after <= low
+                    ):
+                        continue
+                stack.append((cid, key))
+
+    def collections(self):
+        """names of the collections in the repository."""
+        names: list[str] = []
+        for key, _ in self.walk():
+            name = key.split("/")[0]
+            if not names or names[-1] != name:
+                names.append(name)
+        return names
+
+    def records(self, collection: str = "") -> Iterator[dict[str, Any]]:
+        """yield {"uri", "cid", "value"} like com.atproto.repo.listRecords, in key order."""
+        for key, cid in self.walk(collection):
+            if cid.bytes in self.index:
+                yield {"uri": f"at://{self.did}/{key}", "cid": str(cid), "value": cbor.toJson(self.block(cid))}
+
+    def close(self):
+        self.data.close()
+        self.file.close()
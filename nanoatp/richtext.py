@@ -4,27 +4,96 @@
 from __future__ import annotations
 
 import re
-from typing import Any
+import unicodedata
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import TYPE_CHECKING, Any
 
-from tld import get_tld
+from .publicsuffix import publicSuffix
 
-from nanoatp import BskyAgent
+if TYPE_CHECKING:
+    from .bskyagent import BskyAgent
 
 
-# TODO: utf16
 class RichText:
-    def __init__(self, text: str):
+    """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/rich-text/rich-text.ts
+    facet indices are UTF-8 byte offsets. A prefix table of byte offsets per character is built once per text
+    (not at all for ASCII text), so char <-> byte conversions are O(1) / O(log n).
+    """
+
+    def __init__(self, text: str, facets: list[dict[str, Any]] | None = None):
         self.text = text
-        self.facets: list[dict[str, Any]] = []
+        self.facets: list[dict[str, Any]] = facets or []
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text: str):
+        self._text = text
+        self._offsets: array[int] | None = utf8Offsets(text)
+
+    @property
+    def byteLength(self):
+        return self._offsets[-1] if self._offsets is not None else len(self._text)
+
+    @property
+    def graphemeLength(self):
+        return graphemeLength(self._text)
+
+    def charToByte(self, index: int):
+        return self._offsets[index] if self._offsets is not None else index
+
+    def byteToChar(self, index: int):
+        """index of the character that starts at (or, inside a character, after) the byte offset."""
+        return bisect_left(self._offsets, index) if self._offsets is not None else index
+
+    def slice(self, byteStart: int = 0, byteEnd: int | None = None):
+        """text between two byte offsets."""
+        end = self.byteLength if byteEnd is None else byteEnd
+        return self._text[self.byteToChar(byteStart) : self.byteToChar(end)]
+
+    def insert(self, byteIndex: int, text: str):
+        """insert text at a byte offset and shift facets after it."""
+        index = self.byteToChar(byteIndex)
+        self.text = self._text[:index] + text + self._text[index:]
+        added = len(text.encode())
+        for facet in self.facets:
+            start, end = facet["index"]["byteStart"], facet["index"]["byteEnd"]
+            if byteIndex <= start:  # before the facet
+                facet["index"] = {"byteStart": start + added, "byteEnd": end + added}
+            elif byteIndex < end:  # inside the facet
+                facet["index"] = {"byteStart": start, "byteEnd": end + added}
+        return self
+
+    def delete(self, byteStart: int, byteEnd: int):
+        """delete text between two byte offsets, shrink or shift facets and drop the ones that become empty."""
+        start, end = self.byteToChar(byteStart), self.byteToChar(byteEnd)
+        self.text = self._text[:start] + self._text[end:]
+        removed = byteEnd - byteStart
+        for facet in self.facets:
+            fStart, fEnd = facet["index"]["byteStart"], facet["index"]["byteEnd"]
+            if byteStart <= fStart and byteEnd >= fEnd:  # the whole facet is removed
+                fStart, fEnd = 0, 0
+            elif byteStart > fEnd:  # after the facet
+                pass
+            elif fStart < byteStart <= fEnd and byteEnd > fEnd:  # the end of the facet is removed
+                fEnd = byteStart
+            elif byteStart >= fStart and byteEnd <= fEnd:  # inside the facet
+                fEnd -= removed
+            elif byteStart < fStart and fStart <= byteEnd <= fEnd:  # the start of the facet is removed
+                fStart, fEnd = byteStart, fEnd - removed
+            elif byteEnd < fStart:  # before the facet
+                fStart, fEnd = fStart - removed, fEnd - removed
+            facet["index"] = {"byteStart": fStart, "byteEnd": fEnd}
+        self.facets = [facet for facet in self.facets if facet["index"]["byteStart"] < facet["index"]["byteEnd"]]
+        return self
 
     def detectFacets(self, agent: BskyAgent):
-        self.facets = detectFacets(self.text)
-        for facet in self.facets:
-            for feature in facet["features"]:
-                if feature["$type"] == "app.bsky.richtext.facet#mention":
-                    response = agent.resolveHandle(feature["did"])
-                    feature["did"] = response.get("did") or ""
-        self.facets.sort(key=lambda facet: facet["index"]["byteStart"])
+        self.facets = detectFacets(self.text, self._offsets)
+        resolveMentions(agent, [self.facets])
 
     def __str__(self):
         return self.text
@@ -33,62 +102,145 @@ class RichText:
         return len(self.text)
 
 
-MENTION_PATTERN = re.compile(r"(^|\s|\()(@)([a-zA-Z0-9.-]+)(\b)")
-LINK_PATTERN = re.compile(
-    r"(^|\s|\()((https?:\/\/[\S]+)|(([a-z][a-z0-9]*(\.[a-z0-9]+)+)[\S]*))", re.IGNORECASE | re.MULTILINE
+MENTION_PATTERN = r"(?:^|(?<=[\s(]))@(?P<handle>[a-zA-Z0-9.-]+)\b"
+LINK_PATTERN = r"(?:^|(?<=[\s(]))(?P<uri>https?:\/\/\S+|(?P<domain>[a-z][a-z0-9]*(?:\.[a-z0-9]+)+)\S*)"
+TAG_PATTERN = r"(?:^|(?<=\s))[#\uFF03](?!\uFE0F)(?P<tag>[^\s\u00AD\u2060\u200A\u200B\u200C\u200D\u20E2]+)"
+# one alternation, so a single left-to-right scan finds all facets in order of position
+FACET_PATTERN = re.compile(
+    f"(?P<mention>{MENTION_PATTERN})|(?P<link>{LINK_PATTERN})|(?P<hashtag>{TAG_PATTERN})", re.IGNORECASE
 )
+MAX_TAG_LENGTH = 64
 
 
-def detectFacets(text: str):
-    """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/rich-text/detection.ts"""
+def detectFacets(text: str, offsets: array[int] | None = None):
+    """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/rich-text/detection.ts
+    returns mention, link and tag facets sorted by position, indexed by UTF-8 byte offsets.
+    offsets is the table of utf8Offsets(text) if it is already at hand.
+    """
+    offsets = utf8Offsets(text) if offsets is None else offsets
     facets: list[dict[str, Any]] = []
-    facets.extend(detectMentions(text))
-    facets.extend(detectLinks(text))
-    return facets
-
-
-def detectMentions(text: str):
-    """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/rich-text/detection.ts"""
-    facets: list[dict[str, Any]] = []
-    for m in re.findall(MENTION_PATTERN, text):
-        domain = m[2]
-        if not isValidDomain(domain) and not domain.endswith(".test"):
-            continue
-        start = text.find(domain) - 1  # -1 is "@"
-        end = start + len(domain) + 1
+    for m in FACET_PATTERN.finditer(text):
+        if m.group("mention"):
+            domain = m.group("handle")
+            if not isValidDomain(domain) and not domain.endswith(".test"):
+                continue
+            # must be resolved afterwards
+            feature = {"$type": "app.bsky.richtext.facet#mention", "did": domain}
+            start, end = m.span("mention")
+        elif m.group("link"):
+            uri = m.group("uri")
+            start, end = m.span("uri")
+            if m.group("domain"):  # bare domain
+                if not isValidDomain(m.group("domain")):
+                    continue
+                uri = f"https://{uri}"
+            if re.search(r"[.,;:!?]$", uri):
+                uri = uri[:-1]
+                end -= 1
+            if uri.endswith(")") and "(" not in uri:
+                uri = uri[:-1]
+                end -= 1
+            feature = {"$type": "app.bsky.richtext.facet#link", "uri": uri}
+        else:
+            tag = m.group("tag")
+            start, end = m.span("hashtag")
+            while tag and isPunctuation(tag[-1]):  # strip trailing punctuation
+                tag = tag[:-1]
+                end -= 1
+            if not tag or len(tag) > MAX_TAG_LENGTH or all(c.isdigit() or isPunctuation(c) for c in tag):
+                continue
+            feature = {"$type": "app.bsky.richtext.facet#tag", "tag": tag}
+        if offsets is not None:
+            start, end = offsets[start], offsets[end]
         facets.append(
             {
                 "$type": "app.bsky.richtext.facet",
                 "index": {"byteStart": start, "byteEnd": end},
-                # must be resolved afterwards
-                "features": [{"$type": "app.bsky.richtext.facet#mention", "did": domain}],
+                "features": [feature],
             }
         )
     return facets
 
 
+def resolveMentions(agent: BskyAgent, facetLists: list[list[dict[str, Any]]]):
+    """replace the handles of mention facets with DIDs ("" if unresolved) in place.
+    the handles of all the lists are resolved together with agent.resolveHandles.
+    """
+    mentions = [
+        feature
+        for facets in facetLists
+        for facet in facets
+        for feature in facet["features"]
+        if feature["$type"] == "app.bsky.richtext.facet#mention"
+    ]
+    dids = agent.resolveHandles([feature["did"] for feature in mentions]) if mentions else {}
+    for feature in mentions:
+        feature["did"] = dids.get(feature["did"]) or ""
+    return facetLists
+
+
+def detectMentions(text: str):
+    """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/rich-text/detection.ts"""
+    return [facet for facet in detectFacets(text) if facet["features"][0]["$type"].endswith("#mention")]
+
+
 def detectLinks(text: str):
     """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/rich-text/detection.ts"""
-    facets: list[dict[str, Any]] = []
-    for m in re.findall(LINK_PATTERN, text):
-        uri = m[1]
-        start = text.find(uri)
-        end = start + len(uri)
-        if re.match(r"[.,;!?]$", uri):
-            uri = uri[:-1]
-            end -= 1
-        if re.match(r"[)]$", uri) and "(" not in uri:
-            uri = uri[:-1]
-            end -= 1
-        facets.append(
-            {
-                "$type": "app.bsky.richtext.facet",
-                "index": {"byteStart": start, "byteEnd": end},
-                "features": [{"$type": "app.bsky.richtext.facet#link", "uri": uri}],
-            }
-        )
-    return facets
+    return [facet for facet in detectFacets(text) if facet["features"][0]["$type"].endswith("#link")]
+
+
+def detectTags(text: str):
+    """https://github.com/bluesky-social/atproto/blob/main/packages/api/src/rich-text/detection.ts"""
+    return [facet for facet in detectFacets(text) if facet["features"][0]["$type"].endswith("#tag")]
+
+
+def utf8Offsets(text: str):
+    """prefix table of UTF-8 byte offsets, offsets[i] is the byte offset of text[i] and offsets[-1] the byte length.
+    None for ASCII text, where byte offsets equal character offsets.
+    """
+    if text.isascii():
+        return None
+    sizes = (1 if c < "\x80" else 2 if c < "\u0800" else 3 if c < "\U00010000" else 4 for c in text)
+    return array("L", accumulate(sizes, initial=0))
+
+
+def graphemeLength(text: str):
+    """number of user-perceived characters, an approximation of extended grapheme clusters (UAX #29):
+    combining marks, variation selectors, emoji modifiers and tags, ZWJ sequences and flag pairs count as one.
+    """
+    count = 0
+    joined = False  # previous character was a ZWJ
+    regional = False  # previous character started an unpaired regional indicator
+    for c in text:
+        o = ord(c)
+        if joined or o == 0x200D or isExtend(c):
+            joined = o == 0x200D
+            continue
+        if 0x1F1E6 <= o <= 0x1F1FF:  # regional indicator
+            regional = not regional
+            if not regional:
+                continue  # second half of a flag
+        else:
+            regional = False
+        count += 1
+    return count
+
+
+def isExtend(c: str):
+    o = ord(c)
+    return (
+        unicodedata.category(c) in ("Mn", "Me", "Mc")
+        or 0xFE00 <= o <= 0xFE0F  # variation selectors
+        or 0x1F3FB <= o <= 0x1F3FF  # emoji skin tone modifiers
+        or 0xE0020 <= o <= 0xE007F  # tags
+        or 0xE0100 <= o <= 0xE01EF  # variation selectors supplement
+    )
+
+
+def isPunctuation(c: str):
+    return unicodedata.category(c).startswith("P")
 
 
 def isValidDomain(domain: str):
-    return get_tld(domain, fail_silently=True, fix_protocol=True) is not None
+    """whether domain ends with a suffix in the Public Suffix List, checked offline and memoized."""
+    return publicSuffix(domain) is not None
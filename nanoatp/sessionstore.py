@@ -0,0 +1,75 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Protocol
+
+
+class SessionStore(Protocol):
+    """Where BskyAgent.login looks for a saved session and where the agent saves new or refreshed sessions."""
+
+    def load(self, key: str) -> dict[str, Any] | None: ...
+
+    def save(self, key: str, session: dict[str, Any]): ...
+
+    def delete(self, key: str): ...
+
+
+class MemorySessionStore:
+    """Keeps sessions in memory, e.g. to share them between agents of one process."""
+
+    def __init__(self):
+        self.sessions: dict[str, dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def load(self, key: str) -> dict[str, Any] | None:
+        with self.lock:
+            session = self.sessions.get(key)
+            return dict(session) if session else None
+
+    def save(self, key: str, session: dict[str, Any]):
+        with self.lock:
+            self.sessions[key] = dict(session)
+
+    def delete(self, key: str):
+        with self.lock:
+            self.sessions.pop(key, None)
+
+
+class FileSessionStore(MemorySessionStore):
+    """Persists sessions as a JSON file readable only by the owner, so they survive process restarts.
+
+    The file is rewritten atomically on every change.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.sessions = json.load(f)
+
+    def save(self, key: str, session: dict[str, Any]):
+        super().save(key, session)
+        self._write()
+
+    def delete(self, key: str):
+        super().delete(key)
+        self._write()
+
+    def _write(self):
+        with self.lock:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self.sessions, f)
+                os.chmod(tmp, 0o600)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.remove(tmp) if os.path.exists(tmp) else None
+                raise
@@ -0,0 +1,33 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+
+S32_ALPHABET = "234567abcdefghijklmnopqrstuvwxyz"  # base32-sortable
+
+_lock = threading.Lock()
+_last = 0
+_clockId = random.getrandbits(10)
+
+
+def nextTid():
+    """https://atproto.com/specs/tid a record key from the current time in microseconds and a random clock id.
+    strictly increasing within the process, so keys generated together sort in the order they were made.
+    """
+    global _last
+    with _lock:
+        _last = max(time.time_ns() // 1000, _last + 1)
+        now = _last
+    return s32encode(now << 10 | _clockId)
+
+
+def s32encode(n: int, length: int = 13):
+    chars = []
+    for _ in range(length):
+        chars.append(S32_ALPHABET[n & 31])
+        n >>= 5
+    return "".join(reversed(chars))
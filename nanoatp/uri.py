@@ -0,0 +1,12 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from urllib.parse import urlparse
+
+
+def parseAtUri(uri: str):
+    """https://github.com/bluesky-social/atproto/blob/main/packages/uri/src/index.ts"""
+    u = urlparse(uri)
+    repo = u.netloc
+    _, collection, rkey = u.path.split("/")
+    return repo, collection, rkey
@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import os
+import socket
+import ssl
+import struct
+from base64 import b64encode
+from hashlib import sha1
+from urllib.parse import urlsplit
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class WebSocket:
+    """https://datatracker.ietf.org/doc/html/rfc6455 a minimal blocking client, enough for subscriptions.
+
+    Messages are read from the socket only when recv() is called, so a slow consumer applies
+    backpressure to the server through TCP flow control.
+    """
+
+    def __init__(self, url: str, timeout: float | None = 30.0):
+        u = urlsplit(url)
+        secure = u.scheme == "wss"
+        port = u.port or (443 if secure else 80)
+        self.sock = socket.create_connection((u.hostname, port), timeout=timeout)
+        if secure:
+            self.sock = ssl.create_default_context().wrap_socket(self.sock, server_hostname=u.hostname)
+        self.file = self.sock.makefile("rb")
+        self.closed = False
+        key = b64encode(os.urandom(16)).decode()
+        path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        request = (
+            f"GET {path} HTTP/1.1\r\nHost: {u.netloc}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        )
+        self.sock.sendall(request.encode())
+        status = self.file.readline().decode()
+        headers: dict[str, str] = {}
+        while (line := self.file.readline().decode().strip()) != "":
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        accept = b64encode(sha1((key + GUID).encode()).digest()).decode()
+        if " 101 " not in status or headers.get("sec-websocket-accept") != accept:
+            self.close()
+            raise Exception(f"WebSocket handshake failed: {status.strip()}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args: object):
+        self.close()
+
+    def _read(self, n: int):
+        data = self.file.read(n)
+        if len(data) < n:
+            raise EOFError("connection closed")
+        return data
+
+    def recv(self):
+        """returns the next message (bytes for binary, str for text), or None when the server closed the socket."""
+        message = bytearray()
+        opcode = None
+        while True:
+            b0, b1 = self._read(2)
+            fin, op = b0 & 0x80, b0 & 0x0F
+            length = b1 & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", self._read(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", self._read(8))[0]
+            mask = self._read(4) if b1 & 0x80 else None
+            payload = self._read(length)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if op == OP_PING:
+                self.send(payload, OP_PONG)
+            elif op == OP_CLOSE:
+                self.close()
+                return None
+            elif op != OP_PONG:
+                opcode = op if op != OP_CONTINUATION else opcode
+                message += payload
+                if fin:
+                    return message.decode() if opcode == OP_TEXT else bytes(message)
+
+    def send(self, data: bytes, opcode: int = OP_BINARY):
+        """send a masked frame, as clients must."""
+        mask = os.urandom(4)
+        length = len(data)
+        if length < 126:
+            header = struct.pack(">BB", 0x80 | opcode, 0x80 | length)
+        elif length < 0x10000:
+            header = struct.pack(">BBH", 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 0x80 | 127, length)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+        self.sock.sendall(header + mask + masked)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.send(struct.pack(">H", 1000), OP_CLOSE)
+        except OSError:
+            pass
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.file.close()
+        self.sock.close()
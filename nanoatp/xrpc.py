@@ -0,0 +1,77 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+from typing import Any
+
+QUERY = "query"  # HTTP GET, parameters in the query string
+PROCEDURE = "procedure"  # HTTP POST, input in the body
+JSON = "application/json"
+
+
+class Endpoint:
+    """https://atproto.com/specs/xrpc an XRPC method: its type and input/output encodings."""
+
+    __slots__ = ("nsid", "type", "input", "output", "method")
+
+    def __init__(self, nsid: str, type: str, input: str = "", output: str = JSON):
+        self.nsid = nsid
+        self.type = type
+        self.input = input or (JSON if type == PROCEDURE else "")
+        self.output = output
+        self.method = "POST" if type == PROCEDURE else "GET"
+
+    def __repr__(self):
+        return f"Endpoint({self.nsid!r}, {self.type!r})"
+
+
+# from https://github.com/bluesky-social/atproto/tree/main/lexicons
+ENDPOINTS: dict[str, Endpoint] = {
+    endpoint.nsid: endpoint
+    for endpoint in [
+        Endpoint("com.atproto.server.createSession", PROCEDURE),
+        Endpoint("com.atproto.server.refreshSession", PROCEDURE, input="none"),
+        Endpoint("com.atproto.identity.resolveHandle", QUERY),
+        Endpoint("com.atproto.repo.createRecord", PROCEDURE),
+        Endpoint("com.atproto.repo.putRecord", PROCEDURE),
+        Endpoint("com.atproto.repo.deleteRecord", PROCEDURE),
+        Endpoint("com.atproto.repo.applyWrites", PROCEDURE),
+        Endpoint("com.atproto.repo.getRecord", QUERY),
+        Endpoint("com.atproto.repo.listRecords", QUERY),
+        Endpoint("com.atproto.repo.uploadBlob", PROCEDURE, input="*/*"),
+        Endpoint("com.atproto.sync.getRepo", QUERY, output="application/vnd.ipld.car"),
+        Endpoint("app.bsky.actor.getProfile", QUERY),
+        Endpoint("app.bsky.actor.getProfiles", QUERY),
+        Endpoint("app.bsky.feed.getTimeline", QUERY),
+        Endpoint("app.bsky.feed.getAuthorFeed", QUERY),
+        Endpoint("app.bsky.feed.getPostThread", QUERY),
+        Endpoint("app.bsky.feed.getPosts", QUERY),
+        Endpoint("app.bsky.feed.getLikes", QUERY),
+        Endpoint("app.bsky.graph.getFollows", QUERY),
+        Endpoint("app.bsky.graph.getFollowers", QUERY),
+        Endpoint("app.bsky.graph.getBlocks", QUERY),
+        Endpoint("app.bsky.notification.listNotifications", QUERY),
+        Endpoint("app.bsky.notification.getUnreadCount", QUERY),
+        Endpoint("app.bsky.notification.updateSeen", PROCEDURE, output=""),
+    ]
+}
+
+
+def getEndpoint(nsid: str, hasBody: bool = False):
+    """the endpoint of nsid. methods not in ENDPOINTS are procedures if they have a body, otherwise queries."""
+    return ENDPOINTS.get(nsid) or Endpoint(nsid, PROCEDURE if hasBody else QUERY)
+
+
+def queryParams(params: dict[str, Any]):
+    """drop unset ("" or None) parameters and spell booleans as the lexicons do."""
+    return {
+        key: ("true" if value else "false") if isinstance(value, bool) else value
+        for key, value in params.items()
+        if value is not None and value != ""
+    }
+
+
+def compact(body: dict[str, Any]):
+    """drop unset ("" or None) top-level fields of a JSON input."""
+    return {key: value for key, value in body.items() if value is not None and value != ""}
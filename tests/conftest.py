@@ -0,0 +1,12 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+from .mockpds import MockPDS
+
+
+@pytest.fixture
+def pds():  # type: ignore
+    with MockPDS() as pds:
+        yield pds
@@ -0,0 +1,110 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import socketserver
+import struct
+import threading
+from base64 import b64encode
+from hashlib import sha1, sha256
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from nanoatp import cbor
+from nanoatp.car import encodeCar
+from nanoatp.cid import CID, DAG_CBOR, cidBytes
+from nanoatp.websocket import GUID
+
+
+def commitFrame(seq: int, repo: str, records: list[tuple[str, dict[str, Any]]]):
+    """a #commit frame creating records, given as (collection/rkey, record) pairs."""
+    ops = []
+    blocks = []
+    for path, record in records:
+        data = cbor.dumps(record)
+        cid = CID(cidBytes(sha256(data).digest(), DAG_CBOR))
+        ops.append({"action": "create", "path": path, "cid": cid})
+        blocks.append((cid, data))
+    commit = CID(cidBytes(sha256(cbor.dumps({"seq": seq})).digest(), DAG_CBOR))
+    body = {
+        "seq": seq,
+        "repo": repo,
+        "rev": f"rev{seq:010d}",
+        "since": None,
+        "commit": commit,
+        "ops": ops,
+        "blocks": encodeCar([commit], blocks),
+        "blobs": [],
+        "rebase": False,
+        "tooBig": False,
+        "time": "2025-01-01T00:00:00.000Z",
+    }
+    return cbor.dumps({"op": 1, "t": "#commit"}) + cbor.dumps(body)
+
+
+def frame(payload: bytes, opcode: int = 0x2):
+    length = len(payload)
+    if length < 126:
+        return struct.pack(">BB", 0x80 | opcode, length) + payload
+    if length < 0x10000:
+        return struct.pack(">BBH", 0x80 | opcode, 126, length) + payload
+    return struct.pack(">BBQ", 0x80 | opcode, 127, length) + payload
+
+
+class MockFirehose:
+    """A local WebSocket server replaying recorded subscribeRepos frames, honouring ?cursor=.
+
+    with MockFirehose(frames) as firehose:
+        for event in Firehose(firehose.url): ...
+
+    frames are (seq, frame bytes) pairs. The connection is dropped after `dropAfter` frames (to test
+    reconnects), otherwise closed once all frames have been sent.
+    """
+
+    def __init__(self, frames: list[tuple[int, bytes]], dropAfter: int | None = None):
+        self.frames = frames
+        self.dropAfter = dropAfter
+        self.cursors: list[int | None] = []  # cursor of each connection
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"ws://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: Any):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        firehose = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            wbufsize = -1
+
+            def handle(self):
+                path = self.rfile.readline().decode().split(" ")[1]
+                headers = {}
+                while (line := self.rfile.readline().decode().strip()) != "":
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                accept = b64encode(sha1((headers["sec-websocket-key"] + GUID).encode()).digest()).decode()
+                self.wfile.write(
+                    b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                    + f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+                )
+                cursor = parse_qs(urlparse(path).query).get("cursor", [None])[0]
+                firehose.cursors.append(int(cursor) if cursor is not None else None)
+                frames = [f for seq, f in firehose.frames if cursor is None or seq > int(cursor)]
+                for i, payload in enumerate(frames):
+                    if firehose.dropAfter is not None and i == firehose.dropAfter:
+                        self.wfile.flush()
+                        return
+                    self.wfile.write(frame(payload))
+                self.wfile.write(frame(struct.pack(">H", 1000), 0x8))
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,473 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from hashlib import sha256
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+from urllib.parse import parse_qs, quote, urlparse
+
+from nanoatp import cbor
+from nanoatp.car import encodeCar
+from nanoatp.cid import CID, DAG_CBOR, cidBytes, cidForData
+
+DROP = -1  # a failure that processes the request, then closes the connection without a response
+
+
+def keyDepth(key: str):
+    """https://atproto.com/specs/repository#mst-structure leading zero bits of sha256(key), in 2-bit chunks."""
+    digest = int.from_bytes(sha256(key.encode()).digest(), "big")
+    return (256 - digest.bit_length()) // 2
+
+
+def buildMst(entries: list[tuple[str, CID]], blocks: list[tuple[CID, bytes]]) -> CID | None:
+    """build the Merkle Search Tree of sorted (key, record CID) entries, appending its nodes to blocks."""
+
+    def build(entries: list[tuple[str, CID]], depth: int) -> CID | None:
+        if not entries:
+            return None
+        if depth < 0:
+            raise ValueError("duplicate keys")
+        top = [i for i, (key, _) in enumerate(entries) if keyDepth(key) == depth]
+        bounds = [-1, *top, len(entries)]
+        subtrees = [build(entries[bounds[j] + 1 : bounds[j + 1]], depth - 1) for j in range(len(bounds) - 1)]
+        node: dict[str, Any] = {"l": subtrees[0], "e": []}
+        previous = b""
+        for j, i in enumerate(top):
+            key = entries[i][0].encode()
+            p = 0
+            while p < min(len(key), len(previous)) and key[p] == previous[p]:
+                p += 1
+            node["e"].append({"p": p, "k": key[p:], "v": entries[i][1], "t": subtrees[j + 1]})
+            previous = key
+        data = cbor.dumps(node)
+        cid = CID(cidBytes(sha256(data).digest(), DAG_CBOR))
+        blocks.append((cid, data))
+        return cid
+
+    return build(entries, max((keyDepth(key) for key, _ in entries), default=0))
+
+
+class MockPDS:
+    """A minimal in-memory XRPC server that implements the endpoints BskyAgent uses.
+
+    with MockPDS(latency=0.05, rateLimit=(100, 1.0)) as pds:
+        agent = BskyAgent(pds.url)
+        agent.login(pds.handle, pds.password)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rateLimit: tuple[int, float] | None = None,
+        handle: str = "alice.test",
+        password: str = "hunter2",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.rateLimit = rateLimit  # (requests, seconds) per fixed window
+        self.windows: dict[str, list[float]] = {}  # account did ("" if anonymous) -> [reset, used]
+        self.rejected = 0  # requests answered with 429
+        self.failures: list[int] = []  # status codes to answer the next requests with, or DROP
+        self.handle = handle
+        self.password = password
+        self.handles: dict[str, str] = {}
+        self.passwords: dict[str, str] = {}  # did -> password
+        self.repos: dict[str, dict[str, dict[str, dict[str, Any]]]] = {}  # did -> collection -> rkey -> record
+        self.did = self.addAccount(handle, password)
+        self.records = self.repos[self.did]  # of the first account
+        self.blobs: dict[str, bytes] = {}
+        self.blocks: list[dict[str, Any]] = []
+        self.notifications: list[dict[str, Any]] = []  # newest first
+        self.cards: dict[str, dict[str, str]] = {}  # url -> {title, description, image}
+        self.images: dict[str, bytes] = {}  # image url -> png data
+        self.calls: dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.tokens = 0
+        self.clock = 0
+        self.sessions: dict[str, str] = {}  # access token -> did, one per account
+        self.refreshTokens: dict[str, str] = {}  # refresh token -> did
+        self.expired: set[str] = set()
+        self.routes: dict[str, Callable[[dict[str, str], Any, dict[str, str]], tuple[Any, ...]]] = {
+            "com.atproto.server.createSession": self.createSession,
+            "com.atproto.server.refreshSession": self.refreshSession,
+            "com.atproto.repo.createRecord": self.createRecord,
+            "com.atproto.repo.applyWrites": self.applyWrites,
+            "com.atproto.repo.getRecord": self.getRecord,
+            "com.atproto.repo.deleteRecord": self.deleteRecord,
+            "com.atproto.repo.listRecords": self.listRecords,
+            "com.atproto.repo.uploadBlob": self.uploadBlob,
+            "com.atproto.identity.resolveHandle": self.resolveHandle,
+            "app.bsky.graph.getBlocks": self.getBlocks,
+            "com.atproto.sync.getRepo": self.getRepo,
+            "app.bsky.feed.getTimeline": self.getTimeline,
+            "app.bsky.feed.getAuthorFeed": self.getAuthorFeed,
+            "app.bsky.feed.getPosts": self.getPosts,
+            "app.bsky.notification.listNotifications": self.listNotifications,
+        }
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any):
+        self.stop()
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def addAccount(self, handle: str, password: str):
+        """create another account, returns its did."""
+        did = "did:plc:" + sha256(handle.encode()).hexdigest()[:24]
+        self.handles[handle] = did
+        self.passwords[did] = password
+        self.repos.setdefault(did, {})
+        return did
+
+    def count(self, nsid: str):
+        return self.calls.get(nsid, 0)
+
+    # helpers
+
+    def _nextToken(self):
+        self.tokens += 1
+        return f"jwt-{self.tokens}"
+
+    def _nextRkey(self):
+        # monotonic and lexicographically sortable like a TID
+        self.clock = max(self.clock + 1, time.time_ns() // 1000)
+        return f"{self.clock:016d}"
+
+    def _cid(self, value: Any):
+        return cidForData(cbor.dumps(cbor.fromJson(value)), DAG_CBOR)
+
+    def _authorized(self, headers: dict[str, str]):
+        """the did of the account whose access token is in the headers, or ""."""
+        return self.sessions.get((headers.get("Authorization") or "").removeprefix("Bearer "), "")
+
+    def _unauthorized(self, headers: dict[str, str]):
+        if headers.get("Authorization") in self.expired:
+            return 400, {"error": "ExpiredToken", "message": "Token has expired"}
+        return 401, {"error": "AuthenticationRequired", "message": "Authentication Required"}
+
+    def expire(self, did: str = ""):
+        """expire the current access token of an account (the first one by default), as if its lifetime had passed."""
+        with self.lock:
+            for token, owner in list(self.sessions.items()):
+                if owner == (did or self.did):
+                    self.expired.add(f"Bearer {token}")
+                    del self.sessions[token]
+
+    def _put(self, did: str, collection: str, rkey: str, value: dict[str, Any]):
+        uri = f"at://{did}/{collection}/{rkey}"
+        record = {"uri": uri, "cid": self._cid(value), "value": value}
+        self.repos[did].setdefault(collection, {})[rkey] = record
+        return record
+
+    def _repoOf(self, repo: str):
+        """records of a repo given by did or handle."""
+        return self.repos.get(self.handles.get(repo, repo), {})
+
+    # endpoints
+
+    def createSession(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        identifier = body.get("identifier") or ""
+        did = self.handles.get(identifier, identifier)
+        if did not in self.passwords or body.get("password") != self.passwords[did]:
+            return 401, {"error": "AuthenticationRequired", "message": "Invalid identifier or password"}
+        session = self._newSession(did)
+        return 200, {"email": f"{session['handle']}@example.com", **session}
+
+    def refreshSession(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        did = self.refreshTokens.get((headers.get("Authorization") or "").removeprefix("Bearer "))
+        if not did:
+            return 400, {"error": "InvalidToken", "message": "Token could not be verified"}
+        return 200, self._newSession(did)
+
+    def _newSession(self, did: str):
+        # only the newest session of an account is valid, refresh tokens are rotated
+        self.sessions = {token: owner for token, owner in self.sessions.items() if owner != did}
+        self.refreshTokens = {token: owner for token, owner in self.refreshTokens.items() if owner != did}
+        accessJwt, refreshJwt = self._nextToken(), self._nextToken()
+        self.sessions[accessJwt] = did
+        self.refreshTokens[refreshJwt] = did
+        handle = next(handle for handle, owner in self.handles.items() if owner == did)
+        return {"did": did, "handle": handle, "accessJwt": accessJwt, "refreshJwt": refreshJwt}
+
+    def createRecord(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        did = self._authorized(headers)
+        if not did:
+            return self._unauthorized(headers)
+        rkey = body.get("rkey") or self._nextRkey()
+        if rkey in self.repos[did].get(body["collection"], {}):
+            return 400, {"error": "InvalidRequest", "message": "Record already exists"}
+        record = self._put(did, body["collection"], rkey, body["record"])
+        return 200, {"uri": record["uri"], "cid": record["cid"]}
+
+    def applyWrites(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        did = self._authorized(headers)
+        if not did:
+            return self._unauthorized(headers)
+        writes = body.get("writes") or []
+        if len(writes) > 200:
+            return 400, {"error": "InvalidRequest", "message": "Too many writes. Max: 200"}
+        results: list[dict[str, Any]] = []
+        for write in writes:
+            kind = write["$type"].removeprefix("com.atproto.repo.applyWrites#")
+            collection = write["collection"]
+            if kind == "delete":
+                self.repos[did].get(collection, {}).pop(write["rkey"], None)
+                results.append({"$type": "com.atproto.repo.applyWrites#deleteResult"})
+                continue
+            record = self._put(did, collection, write.get("rkey") or self._nextRkey(), write["value"])
+            results.append(
+                {"$type": f"com.atproto.repo.applyWrites#{kind}Result", "uri": record["uri"], "cid": record["cid"]}
+            )
+        return 200, {"commit": {"cid": self._cid(results), "rev": self._nextRkey()}, "results": results}
+
+    def getRecord(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        record = self._repoOf(params["repo"]).get(params["collection"], {}).get(params["rkey"])
+        if not record or (params.get("cid") and params["cid"] != record["cid"]):
+            return 400, {"error": "RecordNotFound", "message": "Could not locate record"}
+        return 200, record
+
+    def deleteRecord(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        did = self._authorized(headers)
+        if not did:
+            return self._unauthorized(headers)
+        self.repos[did].get(body["collection"], {}).pop(body["rkey"], None)
+        return 200, {}
+
+    def listRecords(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        limit = int(params.get("limit") or 50)
+        reverse = params.get("reverse") == "true"
+        records = self._repoOf(params["repo"]).get(params["collection"], {})
+        rkeys = sorted(records, reverse=not reverse)  # newest first by default
+        cursor = params.get("cursor")
+        if cursor:
+            rkeys = [rkey for rkey in rkeys if (rkey > cursor if reverse else rkey < cursor)]
+        page = rkeys[:limit]
+        response: dict[str, Any] = {"records": [records[rkey] for rkey in page]}
+        if len(rkeys) > limit:
+            response["cursor"] = page[-1]
+        return 200, response
+
+    def uploadBlob(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        if not self._authorized(headers):
+            return self._unauthorized(headers)
+        cid = cidForData(body)
+        self.blobs[cid] = body
+        mimeType = headers.get("Content-Type") or "application/octet-stream"
+        return 200, {"blob": {"$type": "blob", "ref": {"$link": cid}, "mimeType": mimeType, "size": len(body)}}
+
+    def resolveHandle(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        did = self.handles.get(params.get("handle") or "")
+        if not did:
+            return 400, {"error": "InvalidRequest", "message": "Unable to resolve handle"}
+        return 200, {"did": did}
+
+    def getBlocks(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        if not self._authorized(headers):
+            return self._unauthorized(headers)
+        limit = int(params.get("limit") or 50)
+        start = int(params.get("cursor") or 0)
+        response: dict[str, Any] = {"blocks": self.blocks[start : start + limit]}
+        if start + limit < len(self.blocks):
+            response["cursor"] = str(start + limit)
+        return 200, response
+
+    def _feed(self, params: dict[str, str]):
+        """the account's posts as feed items, newest first, paginated by rkey."""
+        limit = int(params.get("limit") or 50)
+        cursor = params.get("cursor") or ""
+        posts = self.records.get("app.bsky.feed.post", {})
+        rkeys = [rkey for rkey in sorted(posts, reverse=True) if not cursor or rkey < cursor]
+        author = {"did": self.did, "handle": self.handle}
+        feed = [{"post": {**posts[rkey], "author": author, "record": posts[rkey]["value"]}} for rkey in rkeys[:limit]]
+        for item in feed:
+            del item["post"]["value"]
+        response: dict[str, Any] = {"feed": feed}
+        if len(rkeys) > limit:
+            response["cursor"] = rkeys[limit - 1]
+        return response
+
+    def getTimeline(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        if not self._authorized(headers):
+            return self._unauthorized(headers)
+        return 200, self._feed(params)
+
+    def getAuthorFeed(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        if not self._authorized(headers):
+            return self._unauthorized(headers)
+        if params.get("actor") not in (self.handle, self.did):
+            return 400, {"error": "InvalidRequest", "message": "Profile not found"}
+        return 200, self._feed(params)
+
+    def getPosts(self, params: dict[str, Any], body: Any, headers: dict[str, str]):
+        if not self._authorized(headers):
+            return self._unauthorized(headers)
+        uris = params.get("uris") or []
+        uris = [uris] if isinstance(uris, str) else uris
+        if len(uris) > 25:
+            return 400, {"error": "InvalidRequest", "message": "uris must not have more than 25 elements"}
+        handles = {did: handle for handle, did in self.handles.items()}
+        posts = []
+        for uri in uris:
+            did, collection, rkey = uri.removeprefix("at://").split("/")
+            record = self.repos.get(did, {}).get(collection, {}).get(rkey)
+            if record:
+                author = {"did": did, "handle": handles.get(did, "")}
+                posts.append({"uri": uri, "cid": record["cid"], "author": author, "record": record["value"]})
+        return 200, {"posts": posts}
+
+    def listNotifications(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        if not self._authorized(headers):
+            return self._unauthorized(headers)
+        limit = int(params.get("limit") or 50)
+        start = int(params.get("cursor") or 0)
+        response: dict[str, Any] = {"notifications": self.notifications[start : start + limit]}
+        if start + limit < len(self.notifications):
+            response["cursor"] = str(start + limit)
+        return 200, response
+
+    def getRepo(self, params: dict[str, str], body: Any, headers: dict[str, str]):
+        did = params.get("did") or ""
+        if did not in self.repos:
+            return 400, {"error": "RepoNotFound", "message": f"Could not find repo for DID: {did}"}
+        blocks: list[tuple[CID, bytes]] = []
+        entries = []
+        for collection, records in self.repos[did].items():
+            for rkey, record in records.items():
+                data = cbor.dumps(cbor.fromJson(record["value"]))
+                blocks.append((CID.decode(record["cid"]), data))
+                entries.append((f"{collection}/{rkey}", CID.decode(record["cid"])))
+        root = buildMst(sorted(entries), blocks)
+        commit = cbor.dumps({"did": did, "version": 3, "data": root, "rev": self._nextRkey(), "prev": None})
+        commitCid = CID(cidBytes(sha256(commit).digest(), DAG_CBOR))
+        return (
+            200,
+            encodeCar([commitCid], [(commitCid, commit), *blocks]),
+            {"Content-Type": "application/vnd.ipld.car"},
+        )
+
+    def _limit(self, key: str = ""):
+        """returns (allowed, ratelimit headers) for a fixed window of rateLimit = (requests, seconds) per account."""
+        if not self.rateLimit:
+            return True, {}
+        limit, window = self.rateLimit
+        now = time.time()
+        with self.lock:
+            state = self.windows.setdefault(key, [0.0, 0])
+            if now >= state[0]:
+                state[:] = [(now // window + 1) * window, 0]
+            allowed = state[1] < limit
+            state[1] += 1 if allowed else 0
+            remaining = limit - state[1]
+            if not allowed:
+                self.rejected += 1
+        reset = f"{state[0]:.3f}"
+        return allowed, {
+            "ratelimit-limit": str(limit),
+            "ratelimit-remaining": str(remaining),
+            "ratelimit-reset": reset,
+        }
+
+    def _dispatch(self, method: str, path: str, query: str, body: bytes, headers: dict[str, str]):
+        nsid = path.removeprefix("/xrpc/")
+        route = self.routes.get(nsid)
+        if route is None:
+            return 501, {"error": "MethodNotImplemented", "message": f"{method} {nsid}"}, {}
+        allowed, limitHeaders = self._limit(self._authorized(headers))
+        if not allowed:
+            return 429, {"error": "RateLimitExceeded", "message": "Rate Limit Exceeded"}, limitHeaders
+        with self.lock:
+            self.calls[nsid] = self.calls.get(nsid, 0) + 1
+            failure = self.failures.pop(0) if self.failures else None
+        if failure and failure != DROP:
+            return failure, {"error": "InternalServerError", "message": "Injected failure"}, limitHeaders
+        if self.latency:
+            time.sleep(self.latency)
+        params = {key: values[-1] if len(values) == 1 else values for key, values in parse_qs(query).items()}
+        isJson = (headers.get("Content-Type") or "").startswith("application/json")
+        payload = json.loads(body) if body and isJson else body
+        with self.lock:
+            status, response, *extra = route(params, payload, headers)
+        if failure == DROP:
+            return None, None, {}
+        return status, response, {**limitHeaders, **(extra[0] if extra else {})}
+
+    def _card(self, path: str, query: str):
+        """a stand-in for cardyb.bsky.app: /v1/extract?url=... and /v1/image?url=..."""
+        url = (parse_qs(query).get("url") or [""])[-1]
+        with self.lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+        if path == "/v1/image" and url in self.images:
+            return 200, self.images[url], {"Content-Type": "image/png"}
+        card = self.cards.get(url)
+        if path != "/v1/extract" or card is None:
+            return 200, {"error": "Unable to generate link preview", "likely_type": "", "url": url}, {}
+        image = f"{self.url}/v1/image?url={quote(card['image'])}" if card.get("image") else ""
+        return 200, {"error": "", "likely_type": "html", "url": url, **card, "image": image}, {}
+
+    def _handler(self):
+        pds = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            wbufsize = -1  # send headers and body in one segment
+            disable_nagle_algorithm = True  # bodies larger than the buffer are written separately
+
+            def log_message(self, format: str, *args: Any):
+                pass
+
+            def _respond(self, method: str):
+                u = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if u.path.startswith("/v1/"):
+                    status, response, headers = pds._card(u.path, u.query)
+                else:
+                    status, response, headers = pds._dispatch(method, u.path, u.query, body, dict(self.headers))
+                if status is None:  # DROP
+                    self.close_connection = True
+                    return
+                data = response if isinstance(response, bytes) else json.dumps(response).encode()
+                headers = {"Content-Type": "application/json; charset=utf-8", **headers}
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    # a stand-in PDS for manual runs: python -m tests.mockpds [port] [latency] [requests per second]
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 2583
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    rate = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    pds = MockPDS(latency=latency, rateLimit=(rate, 1.0) if rate else None, port=port)
+    print(f"{pds.url} handle: {pds.handle} password: {pds.password} did: {pds.did}")
+    pds.server.serve_forever()
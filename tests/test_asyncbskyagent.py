@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+import nanoatp
+
+
+def test_async_agent(pds):
+    async def run():
+        async with nanoatp.AsyncBskyAgent(pds.url, maxConcurrency=4) as agent:
+            session = await agent.login(pds.handle, pds.password)
+            assert session.get("did") == pds.did
+            posted = await asyncio.gather(*[agent.post({"text": f"Hello {i}"}) for i in range(8)])
+            assert len({p["uri"] for p in posted}) == 8
+            repo, _, rkey = nanoatp.parseAtUri(posted[0]["uri"])
+            got = await agent.getPost(repo, rkey)
+            assert got.get("value", {}).get("text") == "Hello 0"
+            handle = await agent.resolveHandle(pds.handle)
+            assert handle.get("did") == pds.did
+            listed = await agent._repo_listRecords(pds.did, "app.bsky.feed.post", limit=100)
+            assert len(listed["records"]) == 8
+            deleted = await asyncio.gather(*[agent.deletePost(p["uri"]) for p in posted])
+            assert all(d.status_code == 200 for d in deleted)
+
+    asyncio.run(run())
+    print("test_async_agent passed")
+
+
+def test_async_agent_concurrency(pds):
+    pds.latency = 0.1
+
+    async def run():
+        async with nanoatp.AsyncBskyAgent(pds.url, maxConcurrency=10) as agent:
+            await agent.login(pds.handle, pds.password)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.gather(*[agent.resolveHandle(pds.handle) for _ in range(10)])
+            return loop.time() - start
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.1 * 10 / 2  # well below the serialized latency
+    print("test_async_agent_concurrency passed")
+
+
+def test_async_agent_close(pds):
+    async def run():
+        agent = nanoatp.AsyncBskyAgent(pds.url)
+        await agent.login(pds.handle, pds.password)
+        pds.latency = 0.3
+        inflight = asyncio.ensure_future(agent.resolveHandle(pds.handle))
+        await asyncio.sleep(0.05)  # let the call start
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await agent.close()  # waits for the call in flight while the loop keeps running
+        ticker.cancel()
+        assert inflight.done() and inflight.result().get("did") == pds.did
+        return ticks
+
+    ticks = asyncio.run(run())
+    assert ticks >= 5
+    print("test_async_agent_close passed")
@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import io
+from itertools import islice
+
+import pytest
+
+from nanoatp import Firehose, cbor
+from nanoatp.car import CarReader, decodeCar, encodeCar
+from nanoatp.cid import CID, cidForData
+from nanoatp.firehose import decodeFrame
+
+from .mockfirehose import MockFirehose, commitFrame
+
+REPO = "did:plc:alice"
+
+
+def frames(n: int):
+    return [
+        (seq, commitFrame(seq, REPO, [(f"app.bsky.feed.post/{seq}", {"text": f"post {seq}"})]))
+        for seq in range(1, n + 1)
+    ]
+
+
+def test_cbor_roundtrip():
+    cid = CID.decode(cidForData(b"hello"))
+    value = {"text": "héllo", "n": -3, "big": 1 << 40, "ok": True, "none": None, "link": cid, "data": b"\x00\x01"}
+    assert cbor.loads(cbor.dumps(value))[0] == value
+    assert list(cbor.loads(cbor.dumps(value))[0]) == ["n", "ok", "big", "data", "link", "none", "text"]
+    assert cbor.toJson(value)["link"] == {"$link": str(cid)}
+    assert cbor.fromJson(cbor.toJson(value)) == value
+    print("test_cbor_roundtrip passed")
+
+
+def test_car():
+    blocks = [(CID.decode(cidForData(data)), data) for data in [b"a", b"bc", b"def"]]
+    car = encodeCar([blocks[0][0]], blocks)
+    roots, decoded = decodeCar(car)
+    assert roots == [blocks[0][0]]
+    assert decoded == dict(blocks)
+    reader = CarReader(io.BytesIO(car))
+    assert reader.roots == roots
+    assert list(reader) == blocks
+    print("test_car passed")
+
+
+def test_decode_frame():
+    event = decodeFrame(frames(1)[0][1])
+    assert event["$type"] == "com.atproto.sync.subscribeRepos#commit"
+    assert event["seq"] == 1
+    assert event["repo"] == REPO
+    assert event["commit"]["$link"].startswith("bafyrei")
+    assert event["ops"][0]["path"] == "app.bsky.feed.post/1"
+    assert event["ops"][0]["record"] == {"text": "post 1"}
+    assert "record" not in decodeFrame(frames(1)[0][1], decodeRecords=False)["ops"][0]
+    print("test_decode_frame passed")
+
+
+def test_firehose():
+    with MockFirehose(frames(50)) as mock:
+        events = list(Firehose(mock.url, reconnect=False))
+    assert [event["seq"] for event in events] == list(range(1, 51))
+    assert events[-1]["ops"][0]["record"]["text"] == "post 50"
+    print("test_firehose passed")
+
+
+def test_firehose_cursor():
+    with MockFirehose(frames(10), dropAfter=4) as mock:
+        firehose = Firehose(mock.url, cursor=2, backoff=0.01)
+        events = list(islice(firehose, 8))
+        firehose.close()
+    assert [event["seq"] for event in events] == list(range(3, 11))
+    assert firehose.cursor == 10
+    assert mock.cursors[:2] == [2, 6]  # resumed after the dropped connection
+    print("test_firehose_cursor passed")
+
+
+@pytest.mark.parametrize("bad", [b"\xff", commitFrame(4, REPO, [("app.bsky.feed.post/4", {"text": "x"})])[:-8]])
+def test_firehose_bad_frame(bad):
+    with MockFirehose([*frames(3), (4, bad), *frames(6)[4:]]) as mock:
+        firehose = Firehose(mock.url, backoff=0.01)
+        seqs = []
+        with pytest.raises(ValueError, match="after seq 3"):
+            for event in firehose:
+                seqs.append(event["seq"])
+    assert seqs == [1, 2, 3] and firehose.cursor == 3
+    assert mock.cursors == [None]  # raised, not reconnected to the same frame
+    print("test_firehose_bad_frame passed")
+
+
+def test_firehose_async():
+    async def consume(url: str):
+        seqs = []
+        async for event in Firehose(url, reconnect=False, maxQueue=4):
+            seqs.append(event["seq"])
+            await asyncio.sleep(0)
+        return seqs
+
+    with MockFirehose(frames(30)) as mock:
+        assert asyncio.run(consume(mock.url)) == list(range(1, 31))
+    print("test_firehose_async passed")
@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+import os
+from io import BytesIO
+
+import pytest
+
+import nanoatp
+from nanoatp.image import imageSize, prepareImage
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def encode(image, format: str, **kwargs):  # type: ignore
+    out = BytesIO()
+    image.save(out, format, **kwargs)
+    return out.getvalue()
+
+
+def photo(width: int, height: int, orientation: int = 1):  # type: ignore
+    """a noisy JPEG that compresses badly, like a camera photo, with EXIF orientation and GPS tags."""
+    image = Image.frombytes("RGB", (width, height), os.urandom(width * height * 3))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x8825] = {2: (35.0, 39.0, 31.0)}  # GPSLatitude
+    return encode(image, "JPEG", quality=95, exif=exif)
+
+
+def test_image_size():
+    image = Image.new("RGBA", (300, 200))
+    assert imageSize(BytesIO(encode(image, "PNG"))) == (300, 200)
+    assert imageSize(BytesIO(encode(image, "GIF"))) == (300, 200)
+    assert imageSize(BytesIO(encode(image, "WEBP", lossless=True))) == (300, 200)
+    assert imageSize(BytesIO(encode(image.convert("RGB"), "WEBP", quality=80))) == (300, 200)
+    assert imageSize(BytesIO(encode(image, "WEBP", exif=Image.Exif().tobytes()))) == (300, 200)
+    assert imageSize(BytesIO(photo(300, 200))) == (300, 200)
+    assert imageSize(BytesIO(photo(300, 200, orientation=6))) == (200, 300)  # rotated 90 degrees
+    f = BytesIO(b"not an image")
+    f.seek(4)
+    assert imageSize(f) is None and f.tell() == 4
+    print("test_image_size passed")
+
+
+def test_prepare_image(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(photo(3000, 2000, orientation=6))
+    data, encoding, width, height = prepareImage(str(path))
+    assert encoding == "image/jpeg" and len(data) <= 1000000
+    assert (width, height) == imageSize(BytesIO(data)) and width < height and max(width, height) <= 2000
+    with Image.open(BytesIO(data)) as image:
+        assert not image.getexif()  # orientation applied, GPS stripped
+    small = tmp_path / "small.png"
+    small.write_bytes(encode(Image.new("RGBA", (64, 32)), "PNG"))
+    assert prepareImage(str(small)) == (small.read_bytes(), "image/png", 64, 32)  # already fits
+    data, encoding, width, height = prepareImage(str(small), maxDimension=16)
+    assert encoding == "image/png" and (width, height) == (16, 8)
+    print("test_prepare_image passed")
+
+
+def test_upload_images_processed(pds, tmp_path):
+    paths = []
+    for i in range(2):
+        path = tmp_path / f"photo{i}.jpg"
+        path.write_bytes(photo(1500, 1000))
+        paths.append(str(path))
+    with nanoatp.ImageProcessor(maxDimension=600, maxWorkers=2) as processor:
+        agent = nanoatp.BskyAgent(pds.url, imageProcessor=processor)
+        agent.login(pds.handle, pds.password)
+        embed = agent.uploadImages(paths)
+    assert [image["aspectRatio"] for image in embed["images"]] == [{"width": 600, "height": 400}] * 2
+    for image in embed["images"]:
+        data = pds.blobs[image["image"]["ref"]["$link"]]
+        assert imageSize(BytesIO(data)) == (600, 400) and image["image"]["size"] == len(data)
+    agent = nanoatp.BskyAgent(pds.url)  # without a processor, the bytes are uploaded as they are
+    agent.login(pds.handle, pds.password)
+    image = agent.uploadImage(paths[0])
+    assert image["aspectRatio"] == {"width": 1500, "height": 1000}
+    assert image["image"]["size"] == os.path.getsize(paths[0])
+    print("test_upload_images_processed passed")
+
+
+def test_upload_image_truncated(pds, tmp_path):
+    path = tmp_path / "truncated.webp"
+    path.write_bytes(encode(Image.new("RGB", (300, 200)), "WEBP", quality=80)[:24])  # VP8 header without the size
+    agent = nanoatp.BskyAgent(pds.url)
+    agent.login(pds.handle, pds.password)
+    image = agent.uploadImage(str(path))
+    assert "aspectRatio" not in image and image["image"]["size"] == 24
+    print("test_upload_image_truncated passed")
@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET = 0.05  # seconds for `import nanoatp` plus parseAtUri
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import nanoatp
+nanoatp.parseAtUri("at://did:plc:abc/app.bsky.feed.post/3k")
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def test_import_time():
+    # best of a few fresh interpreters, to keep scheduling noise out of the measurement
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = [json.loads(subprocess.check_output([sys.executable, "-c", SCRIPT], cwd=root)) for _ in range(3)]
+    elapsed = min(result["elapsed"] for result in results)
+    modules = results[0]["modules"]
+    print(f"import nanoatp: {elapsed * 1000:.2f} ms")
+    assert "requests" not in modules
+    assert "tld" not in modules
+    assert "nanoatp.bskyagent" not in modules
+    assert elapsed < IMPORT_BUDGET
+    print("test_import_time passed")
+
+
+def test_lazy_attributes():
+    import nanoatp
+
+    assert nanoatp.BskyAgent.__name__ == "BskyAgent"
+    assert nanoatp.RichText.__name__ == "RichText"
+    assert set(nanoatp.__all__) <= set(dir(nanoatp))
+    assert all(getattr(nanoatp, name) is not None for name in nanoatp.__all__)
+    print("test_lazy_attributes passed")
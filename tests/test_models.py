@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+import tracemalloc
+
+import pytest
+
+from nanoatp.models import (
+    BlobRef,
+    Facet,
+    Link,
+    Post,
+    Record,
+    StrongRef,
+    fromDict,
+    toDict,
+)
+from nanoatp.richtext import detectFacets
+
+URI = "at://did:plc:alice/app.bsky.feed.post/3k"
+CID = "bafyreie5737gdxlw5i64vzichcalba3z2v5n6icifvx5xytvske7mr3hpm"
+
+
+def post(i: int):
+    return {
+        "uri": f"{URI}{i}",
+        "cid": CID,
+        "value": {
+            "$type": "app.bsky.feed.post",
+            "text": f"Hello #{i} https://example.com",
+            "createdAt": "2025-01-01T00:00:00.000Z",
+            "langs": ["en"],
+            "facets": [
+                {
+                    "$type": "app.bsky.richtext.facet",
+                    "index": {"byteStart": 6, "byteEnd": 6 + len(str(i)) + 1},
+                    "features": [{"$type": "app.bsky.richtext.facet#tag", "tag": str(i)}],
+                }
+            ],
+            "reply": {"root": {"uri": URI, "cid": CID}, "parent": {"uri": URI, "cid": CID}},
+            "embed": {"$type": "app.bsky.embed.images", "images": []},
+            "via": "an unknown field",
+        },
+    }
+
+
+def test_roundtrip():
+    record = Record.fromDict(post(1))
+    assert isinstance(record._value, dict)  # not converted until accessed
+    assert isinstance(record.value, Post)
+    assert record.value.text == "Hello #1 https://example.com"
+    assert record.value.facets[0].index.byteEnd == 8
+    assert record.value.facets[0].features[0].tag == "1"
+    assert record.value.reply.parent == StrongRef(URI, CID)
+    assert record.value.extra == {"via": "an unknown field"}
+    assert record.toDict() == post(1)
+    assert toDict(fromDict(post(1)["value"])) == post(1)["value"]
+    assert fromDict({"$type": "unknown", "a": 1}) == {"$type": "unknown", "a": 1}
+    print("test_roundtrip passed")
+
+
+def test_models():
+    blob = {"$type": "blob", "ref": {"$link": CID}, "mimeType": "image/png", "size": 3}
+    assert BlobRef.fromDict(blob).ref == CID
+    assert BlobRef.fromDict(blob).toDict() == blob
+    assert Post(text="Hi", createdAt="now").toDict() == {
+        "$type": "app.bsky.feed.post",
+        "text": "Hi",
+        "createdAt": "now",
+    }
+    with pytest.raises(TypeError):
+        Post(title="Hi")
+    with pytest.raises(AttributeError):
+        Post().title = "Hi"  # type: ignore
+    wire = detectFacets("see https://example.com")
+    facets = [Facet.fromDict(facet) for facet in wire]
+    assert facets[0].features == [Link("https://example.com")]
+    assert toDict(facets) == wire
+    print("test_models passed")
+
+
+def test_memory():
+    def measure(make):  # type: ignore
+        tracemalloc.start()
+        items = [make(post(i)) for i in range(1000)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert len(items) == 1000
+        return size
+
+    dicts = measure(lambda record: record)
+
+    def typed(record):  # type: ignore
+        model = Record.fromDict(record)
+        model.value  # convert
+        return model
+
+    models = measure(typed)
+    print(f"dicts: {dicts / 1000:.0f} B/record, models: {models / 1000:.0f} B/record")
+    assert models < dicts
+    print("test_memory passed")
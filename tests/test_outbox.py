@@ -0,0 +1,112 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+import json
+import sqlite3
+import time
+
+import pytest
+
+from nanoatp import BskyAgent, Outbox
+
+
+@pytest.fixture
+def agent(pds):  # type: ignore
+    agent = BskyAgent(pds.url)
+    agent.login(pds.handle, pds.password)
+    return agent
+
+
+def test_outbox(pds, agent, tmp_path):
+    (tmp_path / "a.png").write_bytes(b"\x89PNG")
+    with Outbox(agent, str(tmp_path / "outbox.db")) as outbox:
+        ids = [outbox.post({"text": f"{i}"}, key=f"post {i}") for i in range(250)]
+        assert outbox.post({"text": "again"}, key="post 0") == ids[0]  # idempotency key
+        blob = outbox.uploadBlob(str(tmp_path / "a.png"), "image/png")
+        assert outbox.run(workers=2) == {"pending": 0, "running": 0, "done": 251, "failed": 0}
+        assert pds.count("com.atproto.repo.applyWrites") == 2  # 200 + 50
+        assert pds.count("com.atproto.repo.createRecord") == 0
+        posts = pds.records["app.bsky.feed.post"]
+        assert sorted(posts[rkey]["value"]["text"] for rkey in posts) == sorted(str(i) for i in range(250))
+        result = outbox.result(ids[7])
+        assert result["state"] == "done" and posts[result["result"]["uri"].split("/")[-1]]["value"]["text"] == "7"
+        assert outbox.result(blob)["result"]["blob"]["mimeType"] == "image/png"
+    print("test_outbox passed")
+
+
+def test_outbox_retry(pds, agent):
+    agent.rateLimiter.retryDelay = lambda attempt: 0.2 * 2**attempt
+    with Outbox(agent, maxAttempts=2) as outbox:
+        outbox.post({"text": "ok"})
+        outbox.post({"text": "bad", "createdAt": "now"})
+        calls = []
+
+        def applyWrites(params, body, headers):  # type: ignore
+            calls.append(time.time())
+            return 400, {"error": "InvalidRequest"}
+
+        pds.routes["com.atproto.repo.applyWrites"] = applyWrites
+        original = pds.routes["com.atproto.repo.createRecord"]
+
+        def createRecord(params, body, headers):  # type: ignore
+            calls.append(time.time())
+            if body["record"]["text"] == "bad":
+                return 400, {"error": "InvalidRecord", "message": "Invalid createdAt"}
+            return original(params, body, headers)
+
+        pds.routes["com.atproto.repo.createRecord"] = createRecord
+        stats = outbox.run()
+        assert stats["done"] == 1 and stats["failed"] == 1  # the bad job does not hold back the other one
+        assert "InvalidRecord" in outbox.result(2)["error"] and outbox.result(2)["attempts"] == 2
+        assert len(calls) == 3 and calls[1] - calls[0] >= 0.2  # retried after the backoff, not right away
+    print("test_outbox_retry passed")
+
+
+def test_outbox_no_results(pds, agent):
+    agent.rateLimiter.retryDelay = lambda attempt: 0.0
+    original = pds.routes["com.atproto.repo.applyWrites"]
+
+    def applyWrites(params, body, headers):  # type: ignore
+        status, response, *extra = original(params, body, headers)
+        return status, {"commit": response["commit"]}, *extra  # like an older PDS, without results
+
+    pds.routes["com.atproto.repo.applyWrites"] = applyWrites
+    with Outbox(agent) as outbox:
+        ids = [outbox.post({"text": f"{i}"}) for i in range(3)]
+        assert outbox.run() == {"pending": 0, "running": 0, "done": 3, "failed": 0}
+        assert pds.count("com.atproto.repo.createRecord") == 0  # found with getRecord, not created again
+        posts = pds.records["app.bsky.feed.post"]
+        assert sorted(post["value"]["text"] for post in posts.values()) == ["0", "1", "2"]
+        assert all(outbox.result(jobId)["result"]["cid"] for jobId in ids)
+    print("test_outbox_no_results passed")
+
+
+def test_outbox_resume(pds, agent, tmp_path):
+    path = str(tmp_path / "outbox.db")
+    with agent.batch() as batch:
+        for i in range(250):
+            batch.post({"text": f"{i}"})
+    with Outbox(agent, path) as outbox:
+        pds.failures = [None, None, 500]  # listing fails on the third page
+        with pytest.raises(Exception, match="InternalServerError"):
+            outbox.enqueueDeletes(limit=100)
+        assert outbox.stats()["pending"] == 200
+        outbox.post({"text": "crash"})
+    # a crash after the post was sent (below) but before it was marked done
+    db = sqlite3.connect(path)
+    args = json.loads(db.execute("SELECT args FROM jobs WHERE op = 'post'").fetchone()[0])
+    db.execute("UPDATE jobs SET state = 'running', attempts = 1 WHERE op = 'post'")
+    db.commit()
+    db.close()
+    calls = pds.count("com.atproto.repo.listRecords")
+    with Outbox(agent, path) as outbox:
+        assert outbox.enqueueDeletes(limit=100) == 50  # from the checkpoint, the first pages are not listed again
+        assert pds.count("com.atproto.repo.listRecords") == calls + 1
+        assert outbox.enqueueDeletes() == 0  # done
+        agent._repo_createRecord(pds.did, "app.bsky.feed.post", args["record"], rkey=args["rkey"])
+        assert outbox.run() == {"pending": 0, "running": 0, "done": 251, "failed": 0}
+        posts = pds.records["app.bsky.feed.post"]
+        assert [post["value"]["text"] for post in posts.values()] == ["crash"]  # created once
+        assert outbox.enqueueDeletes() == 1  # the deletes have run, the collection is listed again
+        assert outbox.run()["done"] == 252 and not posts
+    print("test_outbox_resume passed")
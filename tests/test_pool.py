@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+
+import pytest
+
+from nanoatp import AgentPool
+
+from .mockpds import MockPDS
+
+
+def test_agent_pool():
+    with MockPDS(rateLimit=(5, 10.0)) as pds:
+        accounts = [(f"bot{i}.test", f"password{i}") for i in range(4)]
+        dids = [pds.addAccount(handle, password) for handle, password in accounts]
+        with AgentPool(pds.url, maxConnections=2, maxWorkers=4) as pool:
+            pool.addAll(accounts)
+            assert len(pool) == 4
+            assert len({id(pool[handle].requests) for handle, _ in accounts}) == 1
+            for _ in range(3):
+                pool.map(lambda agent: agent.post({"text": "Hello"}))
+            for did in dids:
+                assert len(pds.repos[did]["app.bsky.feed.post"]) == 3
+            stats = pool.stats()
+            # 3 posts per account fit each account's own budget of 5 (logins are anonymous)
+            assert stats["statuses"] == {200: 16}
+            assert stats["completed"] == 12 and stats["failed"] == 0
+            assert {limits["remaining"] for limits in stats["rateLimits"].values()} == {2}
+            with pytest.raises(Exception, match="Not logged in"):
+                pool.map(lambda agent: agent.__class__(pds.url).post({"text": "x"}), ["bot0.test"])
+            assert pool.stats()["failed"] == 1
+            assert pool.map(lambda agent: agent.post({"text": "x"}), []) == {}  # no accounts, not all of them
+            for did in dids:
+                assert len(pds.repos[did]["app.bsky.feed.post"]) == 3
+    print("test_agent_pool passed")
+
+
+def test_agent_pool_per_account():
+    with MockPDS() as pds:
+        for i in range(2):
+            pds.addAccount(f"bot{i}.test", "pw")
+        with AgentPool(pds.url, maxWorkers=4, perAccount=1) as pool:
+            pool.addAll([("bot0.test", "pw"), ("bot1.test", "pw")])
+            active = {"bot0.test": 0, "bot1.test": 0}
+            peak = {"bot0.test": 0, "bot1.test": 0}
+            lock = threading.Lock()
+
+            def task(handle):  # type: ignore
+                def run(agent):  # type: ignore
+                    with lock:
+                        active[handle] += 1
+                        peak[handle] = max(peak[handle], active[handle])
+                    time.sleep(0.01)
+                    with lock:
+                        active[handle] -= 1
+                    return agent.session["handle"]
+
+                return run
+
+            futures = [pool.submit(handle, task(handle)) for _ in range(5) for handle in ["bot0.test", "bot1.test"]]
+            assert [future.result() for future in futures] == ["bot0.test", "bot1.test"] * 5
+            assert peak == {"bot0.test": 1, "bot1.test": 1}
+    print("test_agent_pool_per_account passed")
+
+
+def test_agent_pool_throttled():
+    with MockPDS() as pds:
+        for i in range(2):
+            pds.addAccount(f"bot{i}.test", "pw")
+        with AgentPool(pds.url, maxWorkers=1) as pool:
+            pool.addAll([("bot0.test", "pw"), ("bot1.test", "pw")])
+            limiter = pool["bot0.test"].rateLimiter
+            limiter.limit, limiter.remaining, limiter.reset = 10, 0, time.time() + 0.3  # out of budget
+            done = []
+            throttled = pool.submit("bot0.test", lambda agent: done.append("bot0.test"))
+            assert pool.stats()["throttled"] == 1
+            futures = [pool.submit("bot1.test", lambda agent: done.append("bot1.test")) for _ in range(3)]
+            for future in futures:
+                future.result(timeout=0.2)  # not stuck behind bot0 on the only worker
+            throttled.result(timeout=2)
+            assert done == ["bot1.test"] * 3 + ["bot0.test"] and pool.stats()["throttled"] == 0
+    print("test_agent_pool_throttled passed")
@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: 2025 Susumu OTA <1632335+susumuota@users.noreply.github.com>
+# SPDX-License-Identifier: MIT
+
+from nanoatp import RichText
+from nanoatp.publicsuffix import publicSuffix
+from nanoatp.richtext import detectFacets
+
+
+def utf8(text: str, facet: dict):
+    return text.encode()[facet["index"]["byteStart"] : facet["index"]["byteEnd"]].decode()
+
+
+def spans(text: str):
+    return [(utf8(text, f), f["features"][0]) for f in detectFacets(text)]
+
+
+def test_detect_facets_duplicates():
+    text = "@alice.test https://example.com @alice.test https://example.com"
+    facets = detectFacets(text)
+    assert [f["index"]["byteStart"] for f in facets] == [0, 12, 32, 44]
+    assert [text[f["index"]["byteStart"] : f["index"]["byteEnd"]] for f in facets] == text.split(" ")
+    print("test_detect_facets_duplicates passed")
+
+
+def test_detect_facets_links():
+    text = "see https://example.com/a, (https://example.com/b) and https://example.com/(c)."
+    assert [feature["uri"] for _, feature in spans(text)] == [
+        "https://example.com/a",
+        "https://example.com/b",
+        "https://example.com/(c)",
+    ]
+    assert all(span == feature["uri"] for span, feature in spans(text))
+    print("test_detect_facets_links passed")
+
+
+def test_detect_facets_tags():
+    text = "#nanoatp x#no #123 #日本語。 #️⃣ (#no) #end!"
+    assert [(span, feature["tag"]) for span, feature in spans(text)] == [
+        ("#nanoatp", "nanoatp"),
+        ("#日本語", "日本語"),
+        ("#end", "end"),
+    ]
+    print("test_detect_facets_tags passed")
+
+
+def test_detect_facets_order():
+    text = "#tag https://example.com @alice.test " * 100
+    facets = detectFacets(text)
+    assert len(facets) == 300
+    starts = [f["index"]["byteStart"] for f in facets]
+    assert starts == sorted(starts)
+    print("test_detect_facets_order passed")
+
+
+def test_utf8_offsets():
+    text = "こんにちは @alice.test 👍 https://example.com/日本 #タグ"
+    rt = RichText(text)
+    facets = detectFacets(text)
+    assert [utf8(text, f) for f in facets] == ["@alice.test", "https://example.com/日本", "#タグ"]
+    assert rt.byteLength == len(text.encode())
+    assert rt.charToByte(6) == 16
+    assert rt.byteToChar(16) == 6
+    assert rt.slice(16, 27) == "@alice.test"
+    assert RichText("é 👨‍👩‍👧 🇯🇵 ☝🏽").graphemeLength == 7
+    assert RichText("abc").byteLength == 3
+    print("test_utf8_offsets passed")
+
+
+def test_insert_delete():
+    rt = RichText("日本 @alice.test end", detectFacets("日本 @alice.test end"))
+    rt.insert(0, "こんにちは ")
+    assert rt.text == "こんにちは 日本 @alice.test end"
+    assert utf8(rt.text, rt.facets[0]) == "@alice.test"
+    rt.insert(rt.charToByte(rt.text.index("test")), "x")  # inside the facet
+    assert utf8(rt.text, rt.facets[0]) == "@alice.xtest"
+    rt.insert(rt.byteLength, "!")  # after the facet
+    assert utf8(rt.text, rt.facets[0]) == "@alice.xtest"
+    rt.delete(0, rt.charToByte(6))  # before the facet
+    assert rt.text == "日本 @alice.xtest end!"
+    assert utf8(rt.text, rt.facets[0]) == "@alice.xtest"
+    start = rt.facets[0]["index"]["byteStart"]
+    rt.delete(start + 6, start + 7)  # inside the facet
+    assert utf8(rt.text, rt.facets[0]) == "@alicextest"
+    rt.delete(0, start + 1)  # the start of the facet
+    assert rt.text == "alicextest end!"
+    assert utf8(rt.text, rt.facets[0]) == "alicextest"
+    rt.delete(0, rt.byteLength)  # the whole facet
+    assert rt.facets == []
+    print("test_insert_delete passed")
+
+
+def test_bare_domain_links():
+    text = "see example.com/x. and foo.invalidtld and file.txt and bsky.app"
+    assert [feature["uri"] for _, feature in spans(text)] == ["https://example.com/x", "https://bsky.app"]
+    assert [span for span, _ in spans(text)] == ["example.com/x", "bsky.app"]
+    print("test_bare_domain_links passed")
+
+
+def test_public_suffix():
+    assert publicSuffix("nanoatp.bsky.social") == "social"
+    assert publicSuffix("x.github.io") == "github.io"
+    assert publicSuffix("a.b.ck") == "b.ck"  # wildcard *.ck
+    assert publicSuffix("www.ck") == "ck"  # exception !www.ck
+    assert publicSuffix("foo.invalidtld") is None
+    assert publicSuffix("alice.test") is None
+    print("test_public_suffix passed")